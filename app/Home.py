@@ -8,13 +8,16 @@ import extra_streamlit_components as stx
 
 # --- PATH SETUP ---
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from backend import database, auth
-from ml_engine import analysis
+from backend import database, auth, analytics_store, quotes
+from ml_engine import analysis, live_nav
 from app import session_manager
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="SmartStoinks", page_icon="📈", layout="wide")
 
+# How often (seconds) the net worth summary refreshes in live mode
+LIVE_REFRESH_SECONDS = 2
+
 # --- FUNCTION TO LOAD CSS ---
 def local_css(file_name):
     with open(file_name) as f:
@@ -136,119 +139,217 @@ if not tickers:
     """, unsafe_allow_html=True)
     st.stop()
 
-# Not sure what this does
+# Holdings are always valued at current prices (a cheap read from the local price
+# store); only the history-based results come from the batch runner's precomputed run
 with st.spinner("Updating portfolio..."):
     prices = database.fetch_market_data(tickers)
 
 # To calculate Values Displayed
-total_val, total_cost = 0, 0
-rows = []
-for t in tickers:
-    qty = portfolio[t]['quantity']
-    cost = portfolio[t]['avg_cost']
-    price = prices[t].iloc[-1] if t in prices else 0
-    val = qty * price
-    rows.append({"Ticker": t, "Price": price, "Value": val, 
-                 "Gain": ((val - (qty*cost))/(qty*cost)*100) if cost > 0 else 0,
-                 "P/L": val - (qty*cost)})
-    total_val += val
-    total_cost += (qty*cost)
-
-df = pd.DataFrame(rows)
-total_pl = total_val - total_cost
-
-# --- UI: YOUR NET WORTH SUMMARY SECTION ---
-st.markdown("<h1>Your Net Worth</h1>", unsafe_allow_html=True)
-st.markdown(f"<h1 style='font-size: 5rem !important; margin-top: -20px;'>${total_val:,.2f}</h1>", unsafe_allow_html=True)
-
-m1, m2, m3 = st.columns(3)
-m1.metric("Total Earnings", f"${total_pl:,.2f}")
-m2.metric("Return", f"{(total_pl/total_cost*100):.2f}%" if total_cost > 0 else "0%")
-if not df.empty:
-    top = df.loc[df['Gain'].idxmax()]
-    m3.metric("Top Performer", top['Ticker'], f"{top['Gain']:.2f}%")
-
-st.markdown("---")
-
-# --- UI: PERFORMANCE CHART ---
-c1, c2 = st.columns([2, 1])
-
-with c1:
-    st.subheader("Performance vs Market")
-    
-    # 1. Determine Start Date (Account Creation vs 1 Year Default)
-    # We try to grab the creation timestamp from the user session
-    created_at = st.session_state.user.get('createdAt')
-    
-    if created_at:
-        # Convert ms timestamp string to datetime object
-        start_date = pd.to_datetime(int(created_at), unit='ms').tz_localize(None)
-    else:
-        # Fallback: If date missing, default to 1 year ago
-        start_date = pd.Timestamp.now() - pd.Timedelta(days=365)
-
-    # 2. Fetch & Filter Data
+latest_prices = prices.ffill().iloc[-1] if not prices.empty else {}
+prices_as_of = prices.index[-1] if not prices.empty else None
+df, total_val, total_cost = analysis.holdings_summary(portfolio, latest_prices)
+
+cached = analytics_store.load_user_analytics(user_id, portfolio)
+
+if cached:
+    user_daily = cached['daily_returns']
+    sp_daily = cached['benchmark_returns']
+    history_as_of = cached.get('prices_as_of')
+else:
+    user_daily = analysis.portfolio_daily_returns(prices)
+    sp_daily = None
+    history_as_of = prices_as_of
+
+# --- CHART DATA ---
+# 1. Determine Start Date (Account Creation vs 1 Year Default)
+# We try to grab the creation timestamp from the user session
+created_at = st.session_state.user.get('createdAt')
+
+if created_at:
+    # Convert ms timestamp string to datetime object
+    start_date = pd.to_datetime(int(created_at), unit='ms').tz_localize(None)
+else:
+    # Fallback: If date missing, default to 1 year ago
+    start_date = pd.Timestamp.now() - pd.Timedelta(days=365)
+
+# 2. Fetch & Filter Data
+if sp_daily is None:
     sp500 = database.fetch_market_data(['^GSPC'])
-    
     if not sp500.empty:
-        # Filter both datasets to start from account creation
-        # We use a 1-day buffer to ensure we catch the opening price of the first day
-        filter_date = start_date - pd.Timedelta(days=1)
-        
-        user_hist = prices[prices.index >= filter_date]
-        sp_hist = sp500[sp500.index >= filter_date]
-        
-        # Guard clause: If account is brand new (no data yet), show last 5 days just to have a chart
-        if len(user_hist) < 2:
-            user_hist = prices.tail(5)
-            sp_hist = sp500.tail(5)
-
-        # 3. Calculate Growth % (Normalized to 0% at start)
-        user_returns = user_hist.pct_change().fillna(0).mean(axis=1)
-        user_growth = (1 + user_returns).cumprod().sub(1).mul(100)
-        
-        sp_series = sp_hist['^GSPC'] if '^GSPC' in sp_hist else sp_hist.iloc[:,0]
-        sp_growth = (1 + sp_series.pct_change().fillna(0)).cumprod().sub(1).mul(100)
-        
-        # 4. Plot
-        fig = go.Figure()
-        
-        # User (Gold Area)
-        fig.add_trace(go.Scatter(
-            x=user_growth.index, y=user_growth,
-            mode='lines', name='My Portfolio',
-            fill='tozeroy', 
-            line=dict(color='#CBA135', width=3)
-        ))
-        
-        # S&P (Grey Dash)
-        fig.add_trace(go.Scatter(
-            x=sp_growth.index, y=sp_growth,
-            mode='lines', name='S&P 500',
-            line=dict(color='#8C8C8C', width=2, dash='dash')
-        ))
-        
-        fig.update_layout(
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            font={'family': "DM Sans"},
-            margin=dict(t=10, l=0, r=0, b=0),
-            hovermode="x unified",
-            xaxis=dict(showgrid=False, showline=True, linecolor='#1A1A1A', tickfont=dict(color='#1A1A1A')),
-            yaxis=dict(showgrid=True, gridcolor='#EAEAEA', tickfont=dict(color='#1A1A1A')),
-            legend=dict(orientation="h", y=1.02, x=1, font=dict(color='#1A1A1A'))
-        )
-        st.plotly_chart(fig, use_container_width=True)
-
-with c2:
-    st.subheader("Allocation")
-    fig_pie = px.pie(df, values='Value', names='Ticker', hole=0.7, 
-                     color_discrete_sequence=['#1A1A1A', '#CBA135', '#8C8C8C', '#E0E0E0'])
-    fig_pie.update_layout(
-        showlegend=False,
+        sp_series = sp500['^GSPC'] if '^GSPC' in sp500 else sp500.iloc[:,0]
+        sp_daily = sp_series.pct_change().fillna(0)
+
+user_growth, sp_growth = None, None
+if sp_daily is not None:
+    # Filter both datasets to start from account creation
+    # We use a 1-day buffer to ensure we catch the opening price of the first day
+    filter_date = start_date - pd.Timedelta(days=1)
+
+    # 3. Calculate Growth % (Normalized to 0% at start)
+    # If the account is brand new (no data yet), this shows the last 5 days just to have a chart
+    user_growth = analysis.growth_since(user_daily, filter_date)
+    sp_growth = analysis.growth_since(sp_daily, filter_date)
+
+# Allocation pie doesn't change with live prices, so we build it once
+fig_pie = px.pie(df, values='Value', names='Ticker', hole=0.7, 
+                 color_discrete_sequence=['#1A1A1A', '#CBA135', '#8C8C8C', '#E0E0E0'])
+fig_pie.update_layout(
+    showlegend=False,
+    paper_bgcolor='rgba(0,0,0,0)',
+    plot_bgcolor='rgba(0,0,0,0)',
+    margin=dict(t=0, l=0, r=0, b=0)
+)
+fig_pie.update_traces(textinfo='percent', textfont_size=14)
+
+def render_summary(total_val, total_cost, top):
+    """
+    Draws the net worth summary. In live mode this reruns on every tick.
+    top: (Ticker, Gain %) of the best holding, or None
+    """
+    total_pl = total_val - total_cost
+
+    # --- UI: YOUR NET WORTH SUMMARY SECTION ---
+    st.markdown("<h1>Your Net Worth</h1>", unsafe_allow_html=True)
+    st.markdown(f"<h1 style='font-size: 5rem !important; margin-top: -20px;'>${total_val:,.2f}</h1>", unsafe_allow_html=True)
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Total Earnings", f"${total_pl:,.2f}")
+    m2.metric("Return", f"{(total_pl/total_cost*100):.2f}%" if total_cost > 0 else "0%")
+    if top is not None:
+        m3.metric("Top Performer", top[0], f"{top[1]:.2f}%")
+
+def render_live_point(nav):
+    """
+    Small chart of the latest growth point, from the last close to now. Only this
+    (two points) is re-sent on every tick, not the whole performance chart.
+    """
+    fig = go.Figure(go.Scatter(
+        x=[prices_as_of, nav.updated_at], y=[nav.base_growth, nav.latest_growth],
+        mode='lines+markers', name='Live',
+        line=dict(color='#CBA135', width=3, dash='dot'),
+        marker=dict(size=[0, 10])
+    ))
+    fig.update_layout(
+        height=160,
         paper_bgcolor='rgba(0,0,0,0)',
         plot_bgcolor='rgba(0,0,0,0)',
-        margin=dict(t=0, l=0, r=0, b=0)
+        font={'family': "DM Sans"},
+        margin=dict(t=30, l=0, r=0, b=0),
+        title=dict(text=f"Live: {nav.latest_growth:.2f}%", font=dict(size=14, color='#1A1A1A')),
+        xaxis=dict(showgrid=False, tickfont=dict(color='#1A1A1A')),
+        yaxis=dict(showgrid=True, gridcolor='#EAEAEA', tickfont=dict(color='#1A1A1A'))
     )
-    fig_pie.update_traces(textinfo='percent', textfont_size=14)
-    st.plotly_chart(fig_pie, use_container_width=True)
+    st.plotly_chart(fig, use_container_width=True)
+
+def render_charts(live_point=None):
+    """
+    Draws the performance chart and the allocation pie. Neither changes with
+    live prices, so they are drawn once per page run, outside the live fragments.
+    live_point: fragment drawing the live growth point under the chart, in live mode
+    """
+    st.markdown("---")
+
+    # --- UI: PERFORMANCE CHART ---
+    c1, c2 = st.columns([2, 1])
+
+    with c1:
+        st.subheader("Performance vs Market")
+
+        if user_growth is not None:
+            # 4. Plot
+            fig = go.Figure()
+            
+            # User (Gold Area)
+            fig.add_trace(go.Scatter(
+                x=user_growth.index, y=user_growth,
+                mode='lines', name='My Portfolio',
+                fill='tozeroy', 
+                line=dict(color='#CBA135', width=3)
+            ))
+            
+            # S&P (Grey Dash)
+            fig.add_trace(go.Scatter(
+                x=sp_growth.index, y=sp_growth,
+                mode='lines', name='S&P 500',
+                line=dict(color='#8C8C8C', width=2, dash='dash')
+            ))
+            
+            fig.update_layout(
+                paper_bgcolor='rgba(0,0,0,0)',
+                plot_bgcolor='rgba(0,0,0,0)',
+                font={'family': "DM Sans"},
+                margin=dict(t=10, l=0, r=0, b=0),
+                hovermode="x unified",
+                xaxis=dict(showgrid=False, showline=True, linecolor='#1A1A1A', tickfont=dict(color='#1A1A1A')),
+                yaxis=dict(showgrid=True, gridcolor='#EAEAEA', tickfont=dict(color='#1A1A1A')),
+                legend=dict(orientation="h", y=1.02, x=1, font=dict(color='#1A1A1A'))
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+        if live_point is not None:
+            live_point()
+
+    with c2:
+        st.subheader("Allocation")
+        st.plotly_chart(fig_pie, use_container_width=True)
+
+# --- LIVE MODE ---
+# A background quote stream feeds price ticks; only the summary and the live
+# point rerun, and each tick only revalues the holdings whose price changed.
+live_mode = st.sidebar.toggle("Live Mode", key="live_mode")
+
+if live_mode:
+    # A new day of prices restarts live mode too, so it never measures from an old close
+    fingerprint = (analytics_store.portfolio_fingerprint(portfolio), str(prices_as_of))
+    if st.session_state.get("live_fingerprint") != fingerprint:
+        if 'quote_stream' in st.session_state:
+            st.session_state.quote_stream.stop()
+        last_prices = dict(zip(df['Ticker'], df['Price'])) if not df.empty else {}
+        # LiveNav measures intraday moves from last_prices, so its starting growth must
+        # come from the same prices, not from the chart (which may be the batch snapshot)
+        base_growth = 0.0
+        if not prices.empty:
+            current_growth = analysis.growth_since(analysis.portfolio_daily_returns(prices),
+                                                   start_date - pd.Timedelta(days=1))
+            base_growth = current_growth.iloc[-1] if not current_growth.empty else 0.0
+        st.session_state.live_nav = live_nav.LiveNav(portfolio, last_prices, base_growth=base_growth)
+        st.session_state.quote_stream = quotes.QuoteStream(quotes.make_source(last_prices))
+        st.session_state.live_fingerprint = fingerprint
+    st.session_state.quote_stream.start()
+
+    def live_nav_now():
+        nav = st.session_state.live_nav
+        nav.apply(st.session_state.quote_stream.drain())
+        return nav
+
+    @st.fragment(run_every=LIVE_REFRESH_SECONDS)
+    def live_summary():
+        nav = live_nav_now()
+        render_summary(nav.total_val, nav.total_cost, nav.top_performer)
+        st.caption(f"🟢 Live · updated {nav.updated_at:%H:%M:%S}")
+
+    @st.fragment(run_every=LIVE_REFRESH_SECONDS)
+    def live_point():
+        if prices_as_of is not None:
+            render_live_point(live_nav_now())
+
+    live_summary()
+    render_charts(live_point=live_point)
+else:
+    if 'quote_stream' in st.session_state:
+        st.session_state.quote_stream.stop()
+        del st.session_state.quote_stream
+        st.session_state.pop("live_fingerprint", None)
+
+    top = None
+    if not df.empty:
+        top_row = df.loc[df['Gain'].idxmax()]
+        top = (top_row['Ticker'], top_row['Gain'])
+    render_summary(total_val, total_cost, top)
+    if prices_as_of is not None:
+        as_of = f"Prices as of {prices_as_of:%Y-%m-%d}"
+        if history_as_of is not None and pd.Timestamp(history_as_of).date() < prices_as_of.date():
+            as_of += f" · performance chart as of {pd.Timestamp(history_as_of):%Y-%m-%d}"
+        st.caption(as_of)
+
+    render_charts()
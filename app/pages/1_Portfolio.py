@@ -6,7 +6,7 @@ import extra_streamlit_components as stx
 
 # --- PATH SETUP ---
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from backend import database
+from backend import database, portfolio_import
 from app import session_manager
 
 # --- PAGE CONFIG ---
@@ -81,7 +81,76 @@ with c2:
     else:
         st.info("Your portfolio is empty.")
 
-# --- SECTION 3: CURRENT HOLDINGS SUMMARY ---
+# --- SECTION 3: BULK IMPORT ---
+with st.expander("📥 Bulk Import (CSV / Broker Export)"):
+    st.caption("Upload a CSV with a ticker/symbol column, a quantity/shares column and "
+               "optionally an average cost or total cost basis column.")
+
+    # Shown once after an import (the uploader below starts empty again)
+    if "import_success" in st.session_state:
+        st.success(st.session_state.pop("import_success"))
+
+    # The uploader's key changes after every import, which clears it, so the same
+    # file can't be offered (and in "add" mode, applied) a second time
+    uploader_key = f"import_file_{st.session_state.get('import_count', 0)}"
+    uploaded = st.file_uploader("Holdings file", type=["csv"], key=uploader_key)
+    mode = st.radio("If a ticker is already in your portfolio",
+                    ["replace", "add"], horizontal=True,
+                    format_func=lambda m: "Replace it" if m == "replace" else "Add shares to it")
+
+    if uploaded is not None:
+        # Parse + validate once per upload, not on every rerun. file_id is new for
+        # every upload, so an edited file with the same name and size is read again.
+        file_key = uploaded.file_id
+        if st.session_state.get("import_key") != file_key:
+            with st.spinner("Reading file and checking tickers..."):
+                uploaded.seek(0)
+                imported, errors = portfolio_import.parse_holdings_csv(uploaded)
+                valid = database.validate_tickers(list(imported.keys())) if imported else set()
+
+            # A failed lookup (not the same as "ticker not found") is not cached, so a rerun retries it
+            if valid is not None:
+                invalid = sorted(t for t in imported if t not in valid)
+                errors += [f"Could not find ticker '{t}' on the market." for t in invalid]
+                st.session_state.import_key = file_key
+                st.session_state.import_holdings = {t: v for t, v in imported.items() if t in valid}
+                st.session_state.import_errors = errors
+
+        if st.session_state.get("import_key") != file_key:
+            st.error("Could not reach the market data service to check your tickers. Please try again.")
+            st.button("Retry", key="btn_import_retry")
+        else:
+            imported = st.session_state.import_holdings
+            for err in st.session_state.import_errors:
+                st.warning(err)
+
+            if imported:
+                merged = portfolio_import.merge_holdings(portfolio, imported, mode=mode)
+                preview = portfolio_import.preview_import(portfolio, merged)
+                st.dataframe(
+                    preview,
+                    column_config={
+                        "Old Shares": st.column_config.NumberColumn(format="%.2f"),
+                        "New Shares": st.column_config.NumberColumn(format="%.2f"),
+                        "Old Avg Cost": st.column_config.NumberColumn(format="$%.2f"),
+                        "New Avg Cost": st.column_config.NumberColumn(format="$%.2f"),
+                    },
+                    width='stretch',
+                    hide_index=True
+                )
+
+                if st.button(f"Import {len(imported)} Assets", key="btn_import", width='stretch'):
+                    # One write for the whole import
+                    database.save_user_portfolio(user_id, merged)
+                    for key in ("import_key", "import_holdings", "import_errors"):
+                        st.session_state.pop(key, None)
+                    st.session_state.import_count = st.session_state.get("import_count", 0) + 1
+                    st.session_state.import_success = f"Imported {len(imported)} assets."
+                    st.rerun()
+            else:
+                st.info("No valid holdings found in this file.")
+
+# --- SECTION 4: CURRENT HOLDINGS SUMMARY ---
 st.subheader("Current Holdings Registry")
 
 if tickers:
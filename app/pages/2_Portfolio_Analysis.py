@@ -6,8 +6,8 @@ import os
 
 # --- PATH SETUP ---
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from backend import database
-from ml_engine import analysis
+from backend import database, analytics_store
+from ml_engine import analysis, sentiment, optimizer
 from app import session_manager
 
 st.set_page_config(page_title="Portfolio Analysis", layout="wide")
@@ -26,29 +26,39 @@ if not tickers:
     st.info("Please add stocks on the Home page first.")
     st.stop()
 
-with st.spinner("Crunching the numbers..."):
-    # 1. Fetch Data
-    stock_data = database.fetch_market_data(tickers)
-    sp500_data = database.fetch_market_data(['^GSPC'])
-    
-    # 2. Run Math Engine (Beta, Sharpe, Volatility)
-    if not sp500_data.empty:
-        # Handle S&P 500 formatting
-        sp500_series = sp500_data['^GSPC'] if '^GSPC' in sp500_data.columns else sp500_data.iloc[:, 0]
+# Use the batch runner's precomputed results if they are fresh
+cached = analytics_store.load_user_analytics(user_id, portfolio)
+
+if cached and not cached['risk'].empty:
+    risk_df = cached['risk'].reset_index() # Make Ticker a column
+    corr_matrix = cached['corr']
+else:
+    with st.spinner("Crunching the numbers..."):
+        # 1. Fetch Data
+        stock_data = database.fetch_market_data(tickers)
+        sp500_data = database.fetch_market_data(['^GSPC'])
         
-        # Calculate Risk Metrics
-        risk_df = analysis.calculate_metrics(stock_data, sp500_series)
-        
-        # Calculate Total Return for plotting
-        # (Current Price - Start Price) / Start Price
-        total_returns = (stock_data.iloc[-1] - stock_data.iloc[0]) / stock_data.iloc[0] * 100
-        
-        # Merge metrics into one DataFrame
-        risk_df['Total Return (%)'] = total_returns
-        risk_df = risk_df.reset_index() # Make Ticker a column
-    else:
-        st.error("Could not fetch benchmark data.")
-        st.stop()
+        # 2. Run Math Engine (Beta, Sharpe, Volatility)
+        if not sp500_data.empty:
+            # Handle S&P 500 formatting
+            sp500_series = sp500_data['^GSPC'] if '^GSPC' in sp500_data.columns else sp500_data.iloc[:, 0]
+            
+            # Calculate Risk Metrics
+            risk_df = analysis.calculate_metrics(stock_data, sp500_series)
+            
+            # Calculate Total Return for plotting
+            # (Current Price - Start Price) / Start Price
+            total_returns = (stock_data.iloc[-1] - stock_data.iloc[0]) / stock_data.iloc[0] * 100
+            
+            # Merge metrics into one DataFrame
+            risk_df['Total Return (%)'] = total_returns
+            risk_df = risk_df.reset_index() # Make Ticker a column
+
+            # Calculate correlation
+            corr_matrix = stock_data.pct_change().corr()
+        else:
+            st.error("Could not fetch benchmark data.")
+            st.stop()
 
 # --- VISUALIZATION ---
 
@@ -105,9 +115,6 @@ st.divider()
 st.subheader("🔗 Correlation Matrix")
 st.write("Do your stocks move together? (1.0 = move identically, 0.0 = no relationship)")
 
-# Calculate correlation
-corr_matrix = stock_data.pct_change().corr()
-
 fig_corr = px.imshow(
     corr_matrix, 
     text_auto=".2f",
@@ -115,4 +122,93 @@ fig_corr = px.imshow(
     aspect="auto",
     title="Stock Correlation Heatmap"
 )
-st.plotly_chart(fig_corr, use_container_width=True)
\ No newline at end of file
+st.plotly_chart(fig_corr, use_container_width=True)
+
+st.divider()
+
+# 4. PORTFOLIO OPTIMIZER
+st.subheader("🎯 Portfolio Optimizer")
+st.write("The efficient frontier shows the best possible return for each level of risk "
+         "using only the stocks you already own (no short selling).")
+
+if len(tickers) < 2:
+    st.info("Add at least two assets to get weight suggestions.")
+else:
+    # Served from the price store, so this is cheap even when the metrics above were precomputed
+    opt_prices = database.fetch_market_data(tickers).dropna(axis=1, how='all')
+    if opt_prices.empty:
+        st.error("Could not load price data for the optimizer. Please try again later.")
+    elif opt_prices.shape[1] < 2:
+        st.info("Price data is only available for one of your assets, so there is nothing to optimize yet.")
+    else:
+        mu, cov = optimizer.estimate_inputs(opt_prices)
+        opt = optimizer.efficient_frontier(mu, cov)
+
+        latest_prices = opt_prices.ffill().iloc[-1]
+        current_values = pd.Series({t: portfolio[t]['quantity'] * latest_prices.get(t, 0) for t in mu.index})
+        current_weights = current_values / current_values.sum()
+
+        points = {
+            "Current": optimizer.portfolio_stats(current_weights, mu, cov),
+            "Min Variance": optimizer.portfolio_stats(opt['min_variance'], mu, cov),
+            "Max Sharpe": optimizer.portfolio_stats(opt['max_sharpe'], mu, cov),
+        }
+
+        frontier = opt['frontier']
+        fig_frontier = px.line(frontier, x=frontier['Volatility'] * 100, y=frontier['Return'] * 100,
+                               labels={'x': "Volatility (%)", 'y': "Expected Return (%)"},
+                               title="Efficient Frontier")
+        fig_frontier.update_traces(line=dict(color='#CBA135', width=3), name="Frontier")
+        for name, (ret, vol, _) in points.items():
+            fig_frontier.add_scatter(x=[vol * 100], y=[ret * 100], mode='markers+text', name=name,
+                                     text=[name], textposition='top center', marker=dict(size=12))
+        st.plotly_chart(fig_frontier, use_container_width=True)
+
+        target_name = st.radio("Suggest weights for", ["Max Sharpe", "Min Variance"], horizontal=True)
+        target_weights = opt['max_sharpe'] if target_name == "Max Sharpe" else opt['min_variance']
+
+        st.write("**Rebalancing plan** (keeps your total invested value the same)")
+        orders = optimizer.rebalance_orders(
+            {t: portfolio[t] for t in mu.index}, latest_prices, target_weights
+        )
+        st.dataframe(
+            orders,
+            column_config={
+                "Current Weight": st.column_config.NumberColumn(format="%.1f%%"),
+                "Target Weight": st.column_config.NumberColumn(format="%.1f%%"),
+                "Current Shares": st.column_config.NumberColumn(format="%.2f"),
+                "Target Shares": st.column_config.NumberColumn(format="%.2f"),
+                "Shares to Trade": st.column_config.NumberColumn(format="%+.2f"),
+                "Trade Value": st.column_config.NumberColumn(format="$%+.2f"),
+            },
+            use_container_width=True,
+            hide_index=True
+        )
+        st.caption("Based on the past year of prices. Past performance does not guarantee future results.")
+
+st.divider()
+
+# 4. NEWS SENTIMENT
+st.subheader("📰 News Sentiment")
+st.write("What is the news saying about your holdings? (-1 = very negative, +1 = very positive)")
+
+with st.spinner("Reading the news..."):
+    sentiment_df, articles_df = sentiment.get_news_sentiment(tickers)
+
+if sentiment_df.empty:
+    st.info("No recent news found for your holdings.")
+else:
+    st.dataframe(
+        sentiment_df.reset_index(names="Ticker"),
+        column_config={
+            "Sentiment": st.column_config.ProgressColumn("Sentiment", min_value=-1, max_value=1, format="%.2f"),
+            "Articles": st.column_config.NumberColumn("Articles"),
+        },
+        use_container_width=True,
+        hide_index=True
+    )
+
+    with st.expander("Headlines"):
+        for _, row in articles_df.sort_values('sentiment').iterrows():
+            title = f"[{row['title']}]({row['link']})" if row['link'] else row['title']
+            st.markdown(f"**{row['ticker']}** ({row['sentiment']:+.2f}) {title}")
@@ -6,7 +6,7 @@ import os
 # 1. SETUP PATHS & IMPORTS
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from backend import database
-from ml_engine import analysis
+from ml_engine import analysis, forecast_eval
 from app import session_manager # <--- Importing your new file!
 
 st.set_page_config(page_title="AI Forecast", layout="wide")
@@ -28,6 +28,17 @@ if not tickers:
 # Select Asset
 selected_ticker = st.selectbox("Select asset to predict:", tickers)
 
+# Accuracy Badge (precomputed by `python -m ml_engine.forecast_eval`, nothing is fitted here)
+accuracy = forecast_eval.load_accuracy(selected_ticker)
+if accuracy:
+    month = accuracy['summary'].iloc[-1] # Longest horizon (~30 days)
+    as_of = f" as of {accuracy['as_of']:%b %d, %Y}" if accuracy['as_of'] is not None else ""
+    st.info(f"🎯 **Backtested accuracy{as_of}:** over the past {int(month['Cutoffs'])} months, "
+            f"the 30-day forecast was off by {month['MAPE (%)']:.1f}% on average, and the real price "
+            f"landed inside the shaded range {month['Coverage (%)']:.0f}% of the time.")
+else:
+    st.caption("No backtest available for this asset yet.")
+
 if st.button(f"Generate Forecast for {selected_ticker}", key="forecast_btn"):
     with st.spinner(f"Training Prophet AI Model on {selected_ticker}..."):
         # Fetch Data just for this prediction
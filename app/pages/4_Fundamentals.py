@@ -0,0 +1,74 @@
+import streamlit as st
+import sys
+import os
+
+# --- PATH SETUP ---
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from backend import database, fundamentals
+from app import session_manager
+
+st.set_page_config(page_title="Fundamentals", page_icon="📊", layout="wide")
+
+# --- AUTH CHECK ---
+session_manager.check_login()
+
+st.title("📊 Fundamentals")
+st.markdown("Key ratios for your holdings. Data is cached locally and only refreshed when it gets stale.")
+
+# --- DATA LOADING ---
+user_id = st.session_state.user['localId']
+portfolio = database.get_user_portfolio(user_id)
+tickers = list(portfolio.keys())
+
+if not tickers:
+    st.info("Please add stocks to your portfolio on the Portfolio page first.")
+    st.stop()
+
+with st.spinner("Loading fundamentals..."):
+    fund_df = fundamentals.get_fundamentals(tickers)
+
+# --- FILTERS (Sidebar) ---
+st.sidebar.subheader("Filters")
+
+sector_options = sorted(fund_df['Sector'].dropna().unique().tolist())
+sectors = st.sidebar.multiselect("Sector", sector_options)
+
+pe_values = fund_df['P/E'].dropna()
+pe_range = None
+if not pe_values.empty and pe_values.min() < pe_values.max():
+    use_pe = st.sidebar.checkbox("Filter by P/E")
+    if use_pe:
+        pe_range = st.sidebar.slider("P/E Range",
+                                     float(pe_values.min()), float(pe_values.max()),
+                                     (float(pe_values.min()), float(pe_values.max())))
+
+min_yield = st.sidebar.number_input("Min Dividend Yield (%)", min_value=0.0, step=0.5) / 100
+
+sort_by = st.sidebar.selectbox("Sort by", fundamentals.COLUMNS, index=fundamentals.COLUMNS.index("Market Cap"))
+ascending = st.sidebar.toggle("Ascending", value=False)
+
+# --- TABLE ---
+view = fundamentals.filter_fundamentals(fund_df, sectors=sectors, pe_range=pe_range, min_yield=min_yield)
+view = view.sort_values(sort_by, ascending=ascending, na_position='last')
+
+# Percent columns are stored as fractions (0.25 = 25%)
+view = view.reset_index(names="Ticker")
+for col in ["Dividend Yield", "Gross Margin", "Operating Margin", "Profit Margin"]:
+    view[col] = view[col] * 100
+view["Market Cap"] = view["Market Cap"] / 1e9
+
+st.caption(f"Showing {len(view)} of {len(fund_df)} holdings")
+st.dataframe(
+    view,
+    column_config={
+        "Ticker": st.column_config.TextColumn("Ticker", width="small"),
+        "P/E": st.column_config.NumberColumn("P/E", format="%.1f"),
+        "Market Cap": st.column_config.NumberColumn("Market Cap ($B)", format="$%.1fB"),
+        "Dividend Yield": st.column_config.NumberColumn("Div. Yield", format="%.2f%%"),
+        "Gross Margin": st.column_config.NumberColumn("Gross Margin", format="%.1f%%"),
+        "Operating Margin": st.column_config.NumberColumn("Op. Margin", format="%.1f%%"),
+        "Profit Margin": st.column_config.NumberColumn("Net Margin", format="%.1f%%"),
+    },
+    width='stretch',
+    hide_index=True
+)
@@ -0,0 +1,43 @@
+import datetime as dt
+import hashlib
+import json
+
+from backend import storage
+
+# --- CONFIGURATION ---
+# Precomputed results older than this are ignored and the pages compute live instead
+MAX_AGE = dt.timedelta(hours=24)
+
+def portfolio_fingerprint(portfolio):
+    """
+    Short hash of a portfolio's holdings. If the user edits their portfolio after
+    the batch run, the fingerprint changes and the stale results are ignored.
+    """
+    payload = json.dumps(portfolio, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def _file_name(user_id):
+    return f"analytics/{user_id}.pkl"
+
+def save_user_analytics(user_id, portfolio, results):
+    """
+    Stores precomputed Home/Analysis results for one user.
+    """
+    results = dict(results)
+    results['fingerprint'] = portfolio_fingerprint(portfolio)
+    results['computed_at'] = dt.datetime.now()
+    storage.save_pickle(results, _file_name(user_id))
+
+def load_user_analytics(user_id, portfolio, max_age=MAX_AGE):
+    """
+    Returns the precomputed results for this user, or None if there are none,
+    they are too old, or they were computed for a different portfolio.
+    """
+    results = storage.load_pickle(_file_name(user_id), default=None)
+    if not results:
+        return None
+    if results.get('fingerprint') != portfolio_fingerprint(portfolio):
+        return None
+    if dt.datetime.now() - results.get('computed_at', dt.datetime.min) > max_age:
+        return None
+    return results
@@ -7,6 +7,8 @@ from dotenv import load_dotenv
 import os
 import json
 
+from backend import fundamentals, price_store
+
 # # --- CONFIGURATION ---
 # # Ensure this file exists in your root folder
 # CRED_PATH = "firebase_key.json"
@@ -75,21 +77,32 @@ def get_user_portfolio(user_id):
         print(f"Error fetching portfolio: {e}")
         return {}
     
+def get_all_portfolios():
+    """
+    Retrieves every user's portfolio (used by the batch analytics runner).
+    Returns a dictionary: {user_id: {'AAPL': {'quantity': 10, 'avg_cost': 150}, ...}, ...}
+    Users with an empty portfolio are skipped.
+    """
+    portfolios = {}
+    try:
+        for doc in db.collection("users").stream():
+            data = doc.to_dict().get("portfolio", {})
+            # Old List format (see get_user_portfolio); we don't write it back here
+            if isinstance(data, list):
+                data = {ticker: {'quantity': 1.0, 'avg_cost': 0.0} for ticker in data}
+            if data:
+                portfolios[doc.id] = data
+    except Exception as e:
+        print(f"Error fetching portfolios: {e}")
+    return portfolios
+
 def fetch_sector_info(tickers):
     """
     Fetches sector info (e.g., 'Technology', 'Healthcare') for a list of tickers.
-    Note: fetching .info is slow, so we use it sparingly.
+    Note: fetching .info is slow, so this goes through the cached fundamentals store.
     """
-    sector_map = {}
-    for t in tickers:
-        try:
-            # yfinance allows fetching info object
-            info = yf.Ticker(t).info
-            sector = info.get('sector', 'Unknown')
-            sector_map[t] = sector
-        except Exception:
-            sector_map[t] = 'Unknown'
-    return sector_map
+    sectors = fundamentals.get_fundamentals(tickers)['Sector']
+    return {t: (s if isinstance(s, str) else 'Unknown') for t, s in sectors.items()}
 
 def save_user_portfolio(user_id, portfolio_dict):
     """
@@ -115,10 +128,17 @@ def fetch_market_data(tickers):
     
     # We fetch 1 year of data to calculate trends and volatility
     start_date = dt.datetime.now() - dt.timedelta(days=365)
+
+    # Tickers that are fresh in the shared (memory-mapped) price store are served
+    # from there; only the missing / outdated ones are downloaded
+    stale = price_store.stale_tickers(tickers)
+    fresh = [t for t in tickers if t not in stale]
+    if not stale:
+        return price_store.get_prices(tickers, start=start_date)
     
     try:
         # auto_adjust=False ensures we get the raw columns so we can find 'Adj Close' safely
-        data = yf.download(tickers, start=start_date, progress=False, auto_adjust=False)
+        data = yf.download(stale, start=start_date, progress=False, auto_adjust=False)
         
         # CLEANUP: Handle different return formats from yfinance
         # 1. If 'Adj Close' exists, use it.
@@ -131,11 +151,69 @@ def fetch_market_data(tickers):
         # 3. If we only fetched one stock, yfinance returns a Series. 
         # We convert it to a DataFrame so the rest of the app doesn't break.
         if isinstance(data, pd.Series):
-            data = data.to_frame(name=tickers[0])
-            
-        return data
+            data = data.to_frame(name=stale[0])
+
+        # Share what we downloaded with every other process
+        price_store.update_price_store(data)
     except Exception as e:
         print(f"Error fetching market data: {e}")
         return pd.DataFrame()
-    
 
+    if not fresh:
+        return data
+    if getattr(data.index, 'tz', None) is not None:
+        data.index = data.index.tz_localize(None)
+    combined = pd.concat([price_store.get_prices(fresh, start=start_date), data], axis=1)
+    return combined[[t for t in tickers if t in combined.columns]]
+
+# yfinance doesn't raise when a request fails; it records a message per ticker in
+# yf.shared._ERRORS. Messages containing one of these mean the lookup failed (network,
+# rate limit), not that the ticker doesn't exist.
+LOOKUP_FAILURE_MESSAGES = ('rate limit', 'too many requests', 'timed out', 'timeout',
+                           'connection', 'curl', 'ssl', 'resolve', 'temporarily unavailable')
+
+def _failed_lookups(tickers):
+    """
+    The tickers whose last download failed for a network-type reason.
+    """
+    errors = getattr(getattr(yf, 'shared', None), '_ERRORS', None) or {}
+    return [t for t in tickers
+            if any(m in str(errors.get(t, '')).lower() for m in LOOKUP_FAILURE_MESSAGES)]
+
+def validate_tickers(tickers):
+    """
+    Checks which tickers exist on the market, all in one batched download.
+    We only ask for the last few days of prices, which is much cheaper than
+    calling fetch_market_data (1 year) once per ticker.
+    Returns the set of valid tickers, or None if the lookup itself failed
+    (network error, rate limit etc.), so callers can tell "not found" apart from "try again".
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return set()
+
+    try:
+        data = yf.download(tickers, period="5d", progress=False, auto_adjust=False, threads=True)
+        if 'Adj Close' in data:
+            data = data['Adj Close']
+        elif 'Close' in data:
+            data = data['Close']
+
+        if isinstance(data, pd.Series):
+            data = data.to_frame(name=tickers[0])
+    except Exception as e:
+        print(f"Error validating tickers: {e}")
+        return None
+
+    # A ticker is valid if it has at least one price in the window
+    valid = set(data.columns[data.notna().any()]) if not data.empty else set()
+
+    # No prices at all almost always means the request failed, not that every ticker is wrong
+    if not valid:
+        print("Error validating tickers: no prices returned")
+        return None
+    failed = _failed_lookups([t for t in tickers if t not in valid])
+    if failed:
+        print(f"Error validating tickers: lookup failed for {', '.join(failed)}")
+        return None
+    return valid
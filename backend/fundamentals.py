@@ -0,0 +1,219 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from backend import storage
+
+# --- CONFIGURATION ---
+STORE_FILE = "fundamentals.pkl"
+
+# yfinance .info key -> (column name, dtype, max age in seconds before we refetch)
+# Prices move every day, so price-based ratios go stale fast. Margins only change
+# with quarterly reports and the sector basically never changes.
+DAY = 24 * 60 * 60
+FIELDS = {
+    'trailingPE':                  ("P/E",            'float32', 1 * DAY),
+    'marketCap':                   ("Market Cap",     'float64', 1 * DAY),
+    'trailingAnnualDividendYield': ("Dividend Yield", 'float32', 7 * DAY),
+    'grossMargins':                ("Gross Margin",   'float32', 30 * DAY),
+    'operatingMargins':            ("Operating Margin", 'float32', 30 * DAY),
+    'profitMargins':               ("Profit Margin",  'float32', 30 * DAY),
+    'sector':                      ("Sector",         'category', 90 * DAY),
+}
+COLUMNS = [col for col, _, _ in FIELDS.values()]
+MAX_AGE = pd.Series({col: age for col, _, age in FIELDS.values()}, dtype='float64')
+
+# If yfinance fails for a ticker, wait this long before trying it again
+# (otherwise a bad ticker would be refetched on every page load)
+RETRY_AFTER = 60 * 60
+
+# In-memory copy of the store, so a warm page load only costs one os.stat()
+_STORE = None
+_STORE_MTIME = None
+
+# --- STORE HELPERS ---
+
+def _empty_store():
+    """
+    The store is three aligned tables indexed by ticker:
+    - values:     one compact column per field
+    - fetched_at: unix time each field was last refreshed
+    - failed_at:  unix time of the last failed fetch (NaN if it worked)
+    """
+    values = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype, _ in FIELDS.values()})
+    fetched_at = pd.DataFrame(columns=COLUMNS, dtype='float64')
+    failed_at = pd.Series(dtype='float64')
+    return {'values': values, 'fetched_at': fetched_at, 'failed_at': failed_at}
+
+def _load_store():
+    """
+    Returns the store, reloading it from disk only if another process saved a newer copy.
+    """
+    global _STORE, _STORE_MTIME
+    path = storage.cache_path(STORE_FILE)
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+
+    if _STORE is None or mtime != _STORE_MTIME:
+        _STORE = storage.load_pickle(STORE_FILE, default=None) or _empty_store()
+        _STORE_MTIME = mtime
+    return _STORE
+
+def _save_store(store):
+    global _STORE, _STORE_MTIME
+    storage.save_pickle(store, STORE_FILE)
+    _STORE = store
+    path = storage.cache_path(STORE_FILE)
+    _STORE_MTIME = os.path.getmtime(path) if os.path.exists(path) else None
+
+def _normalize(rows):
+    """
+    Turns {ticker: {info_key: value}} into a typed DataFrame with our column names.
+    Fields .info didn't return stay NaN.
+    """
+    df = pd.DataFrame.from_dict(rows, orient='index')
+    df = df.reindex(columns=list(FIELDS.keys()))
+    df.columns = COLUMNS
+    for col, dtype, _ in FIELDS.values():
+        if dtype == 'category':
+            df[col] = df[col].where(df[col].notna(), None).astype(object)
+        else:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+    return df
+
+def _merge(values, fetched_at, new, expired, now):
+    """
+    Copies the fields of `new` into the store, but only the ones that had expired.
+    A field that .info left out keeps its previous value. Every expired field we
+    asked for is stamped `now`, so each field keeps its own refresh age.
+    Returns the updated (values, fetched_at).
+    """
+    index = values.index.union(new.index)
+    # Work on object columns so new categories can be assigned, then compact again
+    values = values.astype(object).reindex(index)
+    fetched_at = fetched_at.reindex(index=index, columns=COLUMNS)
+
+    expired = expired.reindex(index=new.index, columns=COLUMNS, fill_value=False)
+    for col in COLUMNS:
+        refresh = expired[col]
+        update = refresh & new[col].notna()
+        values.loc[update.index[update], col] = new.loc[update, col]
+        fetched_at.loc[refresh.index[refresh], col] = now
+
+    for col, dtype, _ in FIELDS.values():
+        values[col] = values[col].astype(dtype)
+    return values, fetched_at.astype('float64')
+
+# --- FETCHING ---
+
+def _fetch_one(ticker):
+    """
+    Fetches the raw fields we care about for one ticker.
+    Returns None if yfinance fails.
+    """
+    try:
+        info = yf.Ticker(ticker).info
+        return {key: info.get(key) for key in FIELDS}
+    except Exception as e:
+        print(f"Error fetching fundamentals for {ticker}: {e}")
+        return None
+
+def fetch_fundamentals_batch(tickers, max_workers=16):
+    """
+    Fetches fundamentals for many tickers at the same time.
+    .info is one HTTP round trip per ticker, so we run them in a thread pool
+    instead of waiting on each one in turn.
+    Returns (rows, failed): {ticker: {info_key: value}} and a list of tickers that failed.
+    """
+    rows, failed = {}, []
+    if not tickers:
+        return rows, failed
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers))) as pool:
+        for t, result in zip(tickers, pool.map(_fetch_one, tickers)):
+            if result is None:
+                failed.append(t)
+            else:
+                rows[t] = result
+    return rows, failed
+
+def expired_fields(tickers, now=None):
+    """
+    Boolean DataFrame (ticker x field): True where the field is older than its
+    max age or has never been fetched.
+    """
+    store = _load_store()
+    now = time.time() if now is None else now
+
+    fetched_at = store['fetched_at'].reindex(index=tickers, columns=COLUMNS)
+    # Missing timestamps count as infinitely old
+    age = now - fetched_at.fillna(-np.inf)
+    return age > MAX_AGE
+
+def stale_tickers(tickers, now=None):
+    """
+    Returns the tickers that have at least one expired field, skipping recent failures.
+    """
+    store = _load_store()
+    now = time.time() if now is None else now
+    stale = expired_fields(tickers, now).any(axis=1)
+
+    failed_at = store['failed_at'].reindex(tickers)
+    recently_failed = (now - failed_at) < RETRY_AFTER
+
+    return list(stale[stale & ~recently_failed].index)
+
+# --- PUBLIC API ---
+
+def get_fundamentals(tickers, max_workers=16):
+    """
+    Returns a DataFrame (index = ticker) with P/E, market cap, dividend yield,
+    margins and sector for the given tickers.
+    Only tickers with an expired field hit the network (one .info call each), and
+    only the expired fields are refreshed; everything else is served from the
+    local store.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return _empty_store()['values']
+
+    store = _load_store()
+    expired = expired_fields(tickers)
+    to_fetch = stale_tickers(tickers)
+
+    if to_fetch:
+        rows, failed = fetch_fundamentals_batch(to_fetch, max_workers=max_workers)
+        now = time.time()
+
+        values, fetched_at, failed_at = store['values'], store['fetched_at'], store['failed_at']
+        if rows:
+            values, fetched_at = _merge(values, fetched_at, _normalize(rows), expired, now)
+            failed_at = failed_at.drop(list(rows.keys()), errors='ignore')
+        if failed:
+            failed_at = pd.concat([failed_at.drop(failed, errors='ignore'),
+                                   pd.Series(now, index=failed, dtype='float64')])
+
+        store = {'values': values, 'fetched_at': fetched_at, 'failed_at': failed_at}
+        _save_store(store)
+
+    return store['values'].reindex(tickers)
+
+def filter_fundamentals(df, sectors=None, pe_range=None, min_yield=None, min_market_cap=None):
+    """
+    Filters a fundamentals table for the screener view.
+    Any filter left as None is ignored. Tickers with a missing P/E are kept
+    unless a P/E range is set.
+    """
+    mask = pd.Series(True, index=df.index)
+    if sectors:
+        mask &= df['Sector'].isin(sectors)
+    if pe_range is not None:
+        mask &= df['P/E'].between(*pe_range)
+    if min_yield:
+        mask &= df['Dividend Yield'].fillna(0) >= min_yield
+    if min_market_cap:
+        mask &= df['Market Cap'].fillna(0) >= min_market_cap
+    return df[mask]
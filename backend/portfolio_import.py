@@ -0,0 +1,170 @@
+import csv
+import io
+import re
+
+import pandas as pd
+
+# --- CONFIGURATION ---
+# Brokers all name their columns differently. We match headers case-insensitively
+# (ignoring spaces/punctuation) against these aliases.
+TICKER_ALIASES = {'ticker', 'symbol', 'tickersymbol', 'security', 'instrument'}
+QUANTITY_ALIASES = {'quantity', 'qty', 'shares', 'units', 'sharesheld', 'position'}
+AVG_COST_ALIASES = {'avgcost', 'averagecost', 'averageprice', 'avgprice', 'costpershare',
+                    'costbasispershare', 'pricepaid', 'unitcost', 'averagecostbasis'}
+TOTAL_COST_ALIASES = {'costbasis', 'totalcost', 'costbasistotal', 'bookvalue', 'totalcostbasis'}
+
+# Rows that are not real holdings (cash sweeps, totals, footers)
+SKIP_SYMBOLS = {'', 'CASH', 'TOTAL', 'PENDING', 'ACCOUNTTOTAL', 'SPAXX', 'FCASH'}
+
+_TICKER_RE = re.compile(r'^[A-Z0-9^][A-Z0-9.\-=^]{0,11}$')
+
+# Class shares: brokers write BRK.B, BRK/B or "BRK B", Yahoo wants BRK-B. After a dot
+# only classes A-C are rewritten, so exchange suffixes like VOD.L or SHOP.TO are kept.
+_CLASS_SHARE_RE = re.compile(r'^([A-Z]{1,5})(?:[/ ]([A-Z])|\.([A-C]))$')
+
+def _key(header):
+    return re.sub(r'[^a-z]', '', header.lower())
+
+def _to_number(value):
+    """
+    Parses broker-style numbers: '$1,234.50', '(12.5)', '10 ', '--'.
+    Returns None if the value is empty or not a number.
+    """
+    if value is None:
+        return None
+    text = str(value).strip().replace('$', '').replace(',', '')
+    if text in ('', '-', '--', 'n/a', 'N/A'):
+        return None
+    negative = text.startswith('(') and text.endswith(')')
+    try:
+        number = float(text.strip('()'))
+    except ValueError:
+        return None
+    return -number if negative else number
+
+def _normalize_ticker(ticker):
+    match = _CLASS_SHARE_RE.match(ticker)
+    if match:
+        return f"{match.group(1)}-{match.group(2) or match.group(3)}"
+    return ticker
+
+def _find_columns(fieldnames):
+    """
+    Maps our fields to the actual header names in the file.
+    """
+    columns = {}
+    for name in fieldnames or []:
+        k = _key(name)
+        if k in TICKER_ALIASES:
+            columns.setdefault('ticker', name)
+        elif k in QUANTITY_ALIASES:
+            columns.setdefault('quantity', name)
+        elif k in AVG_COST_ALIASES:
+            columns.setdefault('avg_cost', name)
+        elif k in TOTAL_COST_ALIASES:
+            columns.setdefault('total_cost', name)
+    return columns
+
+# --- PARSING ---
+
+def parse_holdings_csv(file_obj):
+    """
+    Parses a CSV / broker export into the portfolio format.
+    Accepts a text or binary file object and reads it row by row (the whole file
+    is never loaded into memory at once).
+    Multiple lots of the same ticker are combined with a weighted average cost.
+    Returns (holdings, errors):
+      holdings = {'AAPL': {'quantity': 10, 'avg_cost': 150}, ...}
+      errors   = ["Row 4: missing quantity", ...]
+    """
+    if isinstance(file_obj, (bytes, bytearray)):
+        file_obj = io.BytesIO(file_obj)
+    if isinstance(file_obj, io.TextIOBase):
+        return _parse_rows(file_obj)
+
+    # utf-8-sig strips the BOM that Excel likes to add
+    text = io.TextIOWrapper(file_obj, encoding='utf-8-sig', newline='')
+    try:
+        return _parse_rows(text)
+    finally:
+        # Hand the binary file back open (the wrapper would close it when collected),
+        # so the caller can read it again, e.g. on a retry
+        text.detach()
+
+def _parse_rows(file_obj):
+    reader = csv.DictReader(file_obj)
+    columns = _find_columns(reader.fieldnames)
+    if 'ticker' not in columns or 'quantity' not in columns:
+        return {}, ["Could not find a ticker/symbol and a quantity/shares column in the header."]
+
+    totals = {}  # ticker -> [quantity, total cost]
+    errors = []
+    # Row numbers start at 2 because row 1 is the header
+    for row_num, row in enumerate(reader, start=2):
+        ticker = (row.get(columns['ticker']) or '').strip().upper()
+        if ticker.replace(' ', '') in SKIP_SYMBOLS or ticker.endswith('**'):
+            continue
+        ticker = _normalize_ticker(ticker)
+        if not _TICKER_RE.match(ticker):
+            errors.append(f"Row {row_num}: '{ticker}' does not look like a ticker")
+            continue
+
+        qty = _to_number(row.get(columns['quantity']))
+        if qty is None or qty <= 0:
+            errors.append(f"Row {row_num}: missing or invalid quantity for {ticker}")
+            continue
+
+        avg_cost = _to_number(row.get(columns['avg_cost'])) if 'avg_cost' in columns else None
+        if avg_cost is None and 'total_cost' in columns:
+            total_cost = _to_number(row.get(columns['total_cost']))
+            avg_cost = total_cost / qty if total_cost is not None else None
+        avg_cost = max(avg_cost or 0.0, 0.0)
+
+        lot = totals.setdefault(ticker, [0.0, 0.0])
+        lot[0] += qty
+        lot[1] += qty * avg_cost
+
+    holdings = {t: {'quantity': q, 'avg_cost': (c / q) if q else 0.0} for t, (q, c) in totals.items()}
+    return holdings, errors
+
+# --- MERGING ---
+
+def merge_holdings(portfolio, imported, mode="replace"):
+    """
+    Merges imported holdings into an existing portfolio (without modifying either).
+    mode="replace": imported tickers overwrite existing ones.
+    mode="add":     imported shares are added on top, with a weighted average cost.
+    """
+    merged = {t: dict(info) for t, info in portfolio.items()}
+    for t, new in imported.items():
+        old = merged.get(t)
+        if mode == "add" and old:
+            qty = old['quantity'] + new['quantity']
+            cost = old['quantity'] * old['avg_cost'] + new['quantity'] * new['avg_cost']
+            merged[t] = {'quantity': qty, 'avg_cost': cost / qty if qty else 0.0}
+        else:
+            merged[t] = dict(new)
+    return merged
+
+def preview_import(portfolio, merged):
+    """
+    Builds a before/after table so the user can check the import before saving.
+    """
+    rows = []
+    for t in sorted(merged):
+        new, old = merged[t], portfolio.get(t)
+        if old is None:
+            status = "New"
+        elif old['quantity'] == new['quantity'] and old['avg_cost'] == new['avg_cost']:
+            status = "Unchanged"
+        else:
+            status = "Updated"
+        rows.append({
+            "Ticker": t,
+            "Status": status,
+            "Old Shares": old['quantity'] if old else None,
+            "New Shares": new['quantity'],
+            "Old Avg Cost": old['avg_cost'] if old else None,
+            "New Avg Cost": new['avg_cost'],
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,325 @@
+import json
+import os
+import tempfile
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from backend import storage
+
+# --- CONFIGURATION ---
+# The universe of prices lives in one float32 (date x ticker) matrix on disk.
+# Every process (each Streamlit worker, the batch runner) memory-maps the same
+# file read-only, so the OS keeps a single copy in its page cache instead of
+# every process holding its own float64 DataFrame.
+#
+# The matrix is allocated with spare rows and columns. An update never touches
+# data a reader can see: a ticker's new prices go into a spare column, new dates
+# into spare rows (which are NaN for every ticker), and then meta.json is swapped
+# to point at them. Only when the spare room runs out is the matrix rebuilt.
+STORE_DIR = "prices"
+META_FILE = f"{STORE_DIR}/meta.json"
+LOCK_FILE = f"{STORE_DIR}/.lock"
+DTYPE = np.float32
+
+# Spare room added when the matrix is (re)built
+SPARE_ROWS = 400      # a bit over a year of calendar days
+MIN_COLUMNS = 64
+
+# A column replaced by an update is reused after this long, once nobody can
+# still be looking at a view of it
+REUSE_AFTER = 60 * 60
+
+# A ticker's prices are refetched once they are older than this
+MAX_AGE = 12 * 60 * 60
+
+# Open memmaps + metadata for this process, reopened when a writer publishes a new version
+_STORE = None
+
+def _file_names(version):
+    return f"{STORE_DIR}/matrix-{version}.f32", f"{STORE_DIR}/dates-{version}.i64"
+
+def _map(meta, mode='r'):
+    """
+    (matrix, dates) memmaps of a version, at their full allocated size.
+    """
+    rows, cols = meta['capacity']
+    matrix_name, dates_name = _file_names(meta['version'])
+    # Fortran order = each ticker's history is contiguous on disk, so slicing
+    # a date range of one ticker (or a run of neighbouring tickers) is a view
+    matrix = np.memmap(storage.cache_path(matrix_name), dtype=DTYPE, mode=mode,
+                       shape=(rows, cols), order='F')
+    dates = np.memmap(storage.cache_path(dates_name), dtype='datetime64[ns]', mode=mode, shape=(rows,))
+    return matrix, dates
+
+# --- READING ---
+
+def _read_meta():
+    try:
+        with open(storage.cache_path(META_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _open(retry=True):
+    """
+    Returns the current store (memmap, dates, column index), or None if nothing
+    has been written yet. Only touches the disk again when meta.json changes.
+    """
+    global _STORE
+    meta_path = storage.cache_path(META_FILE)
+    try:
+        stamp = os.stat(meta_path).st_mtime_ns
+    except OSError:
+        return None
+    if _STORE is not None and _STORE['stamp'] == stamp:
+        return _STORE
+
+    try:
+        meta = _read_meta()
+        if meta is None:
+            return None
+        if _STORE is not None and _STORE['version'] == meta['version']:
+            matrix, dates = _STORE['matrix'], _STORE['dates_map']
+        else:
+            matrix, dates = _map(meta)
+    except FileNotFoundError:
+        # A rebuild removed the version we just read about; its meta.json is already newer
+        return _open(retry=False) if retry else None
+    except Exception as e:
+        print(f"Error opening price store: {e}")
+        return None
+
+    _STORE = {
+        'stamp': stamp,
+        'version': meta['version'],
+        'matrix': matrix,
+        'dates_map': dates,
+        'dates': pd.DatetimeIndex(np.array(dates[:meta['n_dates']]), name='Date'),
+        'columns': meta['columns'],
+        'updated_at': meta['updated_at'],
+    }
+    return _STORE
+
+def stale_tickers(tickers, max_age=MAX_AGE):
+    """
+    Returns the tickers that are missing from the store or older than max_age.
+    """
+    store = _open()
+    if store is None:
+        return list(tickers)
+    now = time.time()
+    return [t for t in tickers
+            if t not in store['columns'] or now - store['updated_at'].get(t, 0) > max_age]
+
+def get_prices(tickers, start=None, end=None):
+    """
+    Returns a (date x ticker) DataFrame of prices, like fetch_market_data.
+    Tickers not in the store are left out.
+    The data is read-only: if the requested tickers sit next to each other in the
+    store (always true for a single ticker) the DataFrame wraps the memory map
+    directly without copying; otherwise only the requested columns are copied.
+    """
+    store = _open()
+    if store is None:
+        return pd.DataFrame()
+
+    names = [t for t in dict.fromkeys(tickers) if t in store['columns']]
+    if not names:
+        return pd.DataFrame()
+    cols = [store['columns'][t] for t in names]
+
+    dates = store['dates']
+    d0 = dates.searchsorted(pd.Timestamp(start)) if start is not None else 0
+    d1 = dates.searchsorted(pd.Timestamp(end), side='right') if end is not None else len(dates)
+
+    if cols == list(range(cols[0], cols[0] + len(cols))):
+        block = store['matrix'][d0:d1, cols[0]:cols[-1] + 1]
+    else:
+        block = store['matrix'][d0:d1, cols]
+
+    # The store's dates are the union over all tickers (e.g. crypto trades on weekends).
+    # Drop days where none of the requested tickers traded, like a direct download would.
+    # Empty days at either end are sliced off, which keeps the view.
+    traded = ~np.isnan(block).all(axis=1)
+    if traded.any():
+        first, last = np.argmax(traded), len(traded) - np.argmax(traded[::-1])
+        block, traded, d0 = block[first:last], traded[first:last], d0 + first
+    df = pd.DataFrame(block, index=dates[d0:d0 + len(block)], columns=names, copy=False)
+    if not traded.all():
+        df = df[traded]
+    return df
+
+# --- WRITING ---
+
+def _publish(meta):
+    """
+    Swaps in a new meta.json, so readers either see the old state or the new one.
+    """
+    global _STORE
+    path = storage.cache_path(META_FILE)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _STORE = None
+
+def _rebuild(meta, new_prices, now):
+    """
+    Writes a new version holding every ticker of the current one plus `new_prices`
+    (new values win), with fresh spare room. Returns the new meta.
+    """
+    old_columns = meta['columns'] if meta else {}
+    if meta:
+        old_matrix, old_dates_map = _map(meta)
+        old_dates = pd.DatetimeIndex(np.array(old_dates_map[:meta['n_dates']]))
+    else:
+        old_dates = pd.DatetimeIndex([])
+    dates = old_dates.union(new_prices.index)
+    tickers = sorted(set(old_columns) | set(new_prices.columns))
+
+    version = uuid.uuid4().hex
+    rows, cols = len(dates) + SPARE_ROWS, max(2 * len(tickers), MIN_COLUMNS)
+    new_meta = {
+        'version': version,
+        'capacity': [rows, cols],
+        'n_dates': len(dates),
+        'columns': {t: j for j, t in enumerate(tickers)},
+        'updated_at': {t: ts for t, ts in (meta['updated_at'] if meta else {}).items() if t in old_columns},
+        'next_col': len(tickers),
+        'free': [],
+    }
+    try:
+        matrix, dates_map = _map(new_meta, mode='w+')
+        dates_map[:] = np.datetime64('NaT')
+        dates_map[:len(dates)] = dates.values
+        old_pos = dates.get_indexer(old_dates)
+        new_pos = dates.get_indexer(new_prices.index)
+        # One column at a time, so memory stays at one ticker's history
+        for j, t in enumerate(tickers):
+            column = np.full(rows, np.nan, dtype=DTYPE)
+            if t in old_columns:
+                column[old_pos] = old_matrix[:len(old_dates), old_columns[t]]
+            if t in new_prices:
+                _overlay(column, new_pos, new_prices[t])
+                new_meta['updated_at'][t] = now
+            matrix[:, j] = column
+        matrix.flush()
+        dates_map.flush()
+    except BaseException:
+        _remove_version(version)
+        raise
+    return new_meta
+
+def _overlay(column, positions, series):
+    values = series.to_numpy(dtype=DTYPE)
+    ok = ~np.isnan(values)
+    column[positions[ok]] = values[ok]
+
+def _append(meta, new_prices, now):
+    """
+    Writes `new_prices` into spare rows / columns of the current version.
+    Returns the new meta, or None if there isn't enough spare room.
+    """
+    rows, cols = meta['capacity']
+    n_dates = meta['n_dates']
+    matrix, dates_map = _map(meta, mode='r+')
+    old_dates = pd.DatetimeIndex(np.array(dates_map[:n_dates]))
+
+    # New dates can only go after the last one, and must fit in the spare rows
+    added = new_prices.index.difference(old_dates)
+    if len(added) and n_dates and added[0] <= old_dates[-1]:
+        return None
+    if n_dates + len(added) > rows:
+        return None
+
+    # Spare columns: never used ones, then ones replaced long enough ago
+    free = sorted(c for c, freed_at in meta['free'] if now - freed_at > REUSE_AFTER)
+    spare = list(range(meta['next_col'], cols)) + free
+    if len(spare) < len(new_prices.columns):
+        return None
+
+    dates_map[n_dates:n_dates + len(added)] = added.values
+    dates = old_dates.append(added)
+    positions = dates.get_indexer(new_prices.index)
+
+    columns = dict(meta['columns'])
+    replaced = []
+    used = set()
+    for t in new_prices.columns:
+        slot = spare.pop(0)
+        used.add(slot)
+        column = np.full(rows, np.nan, dtype=DTYPE)
+        if t in columns:
+            column[:n_dates] = matrix[:n_dates, columns[t]]
+            replaced.append(columns[t])
+        _overlay(column, positions, new_prices[t])
+        matrix[:, slot] = column
+        columns[t] = slot
+    matrix.flush()
+    dates_map.flush()
+
+    return dict(
+        meta,
+        n_dates=len(dates),
+        columns=columns,
+        updated_at={**meta['updated_at'], **{t: now for t in new_prices.columns}},
+        next_col=max([meta['next_col']] + [c + 1 for c in used]),
+        free=[[c, ts] for c, ts in meta['free'] if c not in used] + [[c, now] for c in replaced],
+    )
+
+def update_price_store(new_prices):
+    """
+    Merges freshly downloaded prices into the store (new values win). Only the
+    tickers in `new_prices` are written, and they are marked as updated now.
+    """
+    if new_prices is None or new_prices.empty:
+        return
+    # Tickers with no prices at all (typos, delisted) are not stored, so they
+    # can't be mistaken for real tickers later
+    new_prices = new_prices.dropna(axis=1, how='all')
+    if new_prices.empty:
+        return
+    new_prices = new_prices.copy()
+    new_prices.columns = [str(t) for t in new_prices.columns]
+    new_prices.index = pd.DatetimeIndex(new_prices.index)
+    if new_prices.index.tz is not None:
+        new_prices.index = new_prices.index.tz_localize(None)
+    new_prices = new_prices[~new_prices.index.duplicated(keep='last')].sort_index()
+
+    meta = new_meta = None
+    try:
+        # Writers are serialized across processes; readers never wait
+        with storage.file_lock(LOCK_FILE):
+            meta = _read_meta()
+            now = time.time()
+            new_meta = _append(meta, new_prices, now) if meta else None
+            if new_meta is None:
+                new_meta = _rebuild(meta, new_prices, now)
+            _publish(new_meta)
+    except Exception as e:
+        # The store is only a cache; the caller still has its freshly downloaded data
+        print(f"Error updating price store: {e}")
+        # A rebuilt version that didn't get published is never read again
+        if new_meta is not None and new_meta['version'] != (meta or {}).get('version'):
+            _remove_version(new_meta['version'])
+        return
+
+    if meta and new_meta['version'] != meta['version']:
+        # Processes that still have the old version mapped keep working: on
+        # Linux/macOS the data stays alive until the last mapping is closed.
+        _remove_version(meta['version'])
+
+def _remove_version(version):
+    for name in _file_names(version):
+        try:
+            os.remove(storage.cache_path(name))
+        except OSError:
+            pass
@@ -0,0 +1,130 @@
+import os
+import random
+import threading
+import time
+
+import pandas as pd
+import yfinance as yf
+
+# --- CONFIGURATION ---
+# "yfinance" polls real quotes, "simulated" generates random ticks locally (for testing / demos)
+QUOTE_SOURCE = os.environ.get("SMARTSTOINKS_QUOTE_SOURCE", "yfinance")
+
+# Seconds between polls of the quote source. A yfinance poll downloads the day's
+# 1-minute bars for every holding, so it runs far less often than the page refreshes.
+POLL_INTERVAL = 2 if QUOTE_SOURCE == "simulated" else 60
+
+# A stream nobody has read from for this long shuts itself down
+# (e.g. the user closed the tab while live mode was on)
+IDLE_TIMEOUT = 60
+
+# --- QUOTE SOURCES ---
+# A quote source is a function that takes no arguments and returns
+# {ticker: latest price} for the tickers it has news about.
+
+def simulated_source(base_prices, tickers_per_tick=3, volatility=0.002, seed=None):
+    """
+    Random-walk tick generator. Each call moves a few random tickers by a small
+    random percentage, like a quiet market.
+    """
+    rng = random.Random(seed)
+    prices = {t: float(p) for t, p in base_prices.items() if p and p > 0}
+    tickers = list(prices)
+
+    def poll():
+        if not tickers:
+            return {}
+        updates = {}
+        for t in rng.sample(tickers, min(tickers_per_tick, len(tickers))):
+            prices[t] *= 1 + rng.gauss(0, volatility)
+            updates[t] = prices[t]
+        return updates
+    return poll
+
+def polling_source(tickers):
+    """
+    Polls yfinance for the latest 1-minute prices of all tickers in one request.
+    """
+    tickers = list(tickers)
+
+    def poll():
+        try:
+            data = yf.download(tickers, period="1d", interval="1m", progress=False, auto_adjust=False)
+            data = data['Close'] if 'Close' in data else data
+            if isinstance(data, pd.Series):
+                data = data.to_frame(name=tickers[0])
+            latest = data.ffill().iloc[-1].dropna()
+            return latest.to_dict()
+        except Exception as e:
+            print(f"Error polling quotes: {e}")
+            return {}
+    return poll
+
+def make_source(base_prices):
+    """
+    Builds the quote source picked by SMARTSTOINKS_QUOTE_SOURCE.
+    """
+    if QUOTE_SOURCE == "simulated":
+        return simulated_source(base_prices)
+    return polling_source(base_prices.keys())
+
+# --- STREAM ---
+
+class QuoteStream:
+    """
+    Runs a quote source in a background thread and collects the updates.
+    Only prices that actually changed are kept, and several ticks for the same
+    ticker between two reads collapse into the latest one, so the reader's work
+    is proportional to the number of changed tickers.
+    """
+
+    def __init__(self, source, interval=POLL_INTERVAL):
+        self.source = source
+        self.interval = interval
+        self._pending = {}
+        self._last = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._last_read = time.time()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._last_read = time.time()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if time.time() - self._last_read > IDLE_TIMEOUT:
+                break
+            self.push(self.source())
+            self._stop.wait(self.interval)
+
+    def push(self, updates):
+        """
+        Adds new prices. Unchanged prices are ignored.
+        """
+        with self._lock:
+            for t, price in updates.items():
+                if self._last.get(t) != price:
+                    self._last[t] = price
+                    self._pending[t] = price
+
+    def drain(self):
+        """
+        Returns {ticker: price} for everything that changed since the last call.
+        """
+        with self._lock:
+            updates, self._pending = self._pending, {}
+            self._last_read = time.time()
+        return updates
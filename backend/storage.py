@@ -0,0 +1,85 @@
+import contextlib
+import os
+import pickle
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# --- CONFIGURATION ---
+# Local cache folder (in the project root) for data we don't want to refetch every rerun.
+CACHE_DIR = os.environ.get(
+    "SMARTSTOINKS_CACHE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.cache'))
+)
+
+# Without fcntl we can only serialize the threads of this process, {name: Lock}
+_THREAD_LOCKS = {}
+_THREAD_LOCKS_GUARD = threading.Lock()
+
+def cache_path(name):
+    """
+    Returns the full path of a file inside the cache folder.
+    `name` may include a sub-folder ("analytics/abc.pkl").
+    Creates the folder the first time it is needed.
+    """
+    path = os.path.join(CACHE_DIR, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def load_pickle(name, default=None):
+    """
+    Loads a pickled object from the cache folder.
+    Returns `default` if the file is missing or unreadable.
+    """
+    path = cache_path(name)
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"Error loading cache file {name}: {e}")
+        return default
+
+def save_pickle(obj, name):
+    """
+    Pickles an object into the cache folder.
+    We write to a temp file first and then swap it in, so a reader
+    (another Streamlit session or the batch runner) never sees half a file.
+    """
+    path = cache_path(name)
+    # Unique temp name: Streamlit sessions are threads in one process, so a pid isn't enough
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Error saving cache file {name}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+@contextlib.contextmanager
+def file_lock(name):
+    """
+    Exclusive lock on a file in the cache folder, held for the `with` block.
+    Use it around read-modify-write cycles on shared cache files. Each caller
+    opens its own handle on the lock file, so threads of the same process are
+    serialized too.
+    """
+    if fcntl is None:
+        with _THREAD_LOCKS_GUARD:
+            lock = _THREAD_LOCKS.setdefault(name, threading.Lock())
+        with lock:
+            yield
+        return
+    with open(cache_path(name), 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
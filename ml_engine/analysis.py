@@ -100,4 +100,46 @@ def predict_future(stock_data, ticker, days=30):
     future = model.make_future_dataframe(periods=days)
     forecast = model.predict(future)
     
-    return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(days)
\ No newline at end of file
+    return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(days)
+
+def holdings_summary(portfolio, latest_prices):
+    """
+    Values each holding at its latest price.
+    Input: portfolio dict and a Series/dict {Ticker: Price}.
+    Output: (DataFrame of Ticker/Price/Value/Gain/P/L rows, total value, total cost)
+    """
+    total_val, total_cost = 0, 0
+    rows = []
+    for t, info in portfolio.items():
+        qty = info['quantity']
+        cost = info['avg_cost']
+        price = latest_prices.get(t, 0)
+        price = 0 if pd.isna(price) else price
+        val = qty * price
+        rows.append({"Ticker": t, "Price": price, "Value": val,
+                     "Gain": ((val - (qty*cost))/(qty*cost)*100) if cost > 0 else 0,
+                     "P/L": val - (qty*cost)})
+        total_val += val
+        total_cost += (qty*cost)
+    return pd.DataFrame(rows), total_val, total_cost
+
+def portfolio_daily_returns(stock_data):
+    """
+    Equal-weighted daily return of a set of stocks (missing days count as 0%).
+    Output: Series indexed by date.
+    """
+    return stock_data.pct_change().fillna(0).mean(axis=1)
+
+def growth_since(daily_returns, start_date, min_points=5):
+    """
+    Cumulative growth (%) of a daily return series, starting at 0% on `start_date`.
+    If there is not enough history after the start date (brand new account),
+    we show the last `min_points` days instead so there is still a chart.
+    """
+    hist = daily_returns[daily_returns.index >= start_date]
+    if len(hist) < 2:
+        hist = daily_returns.tail(min_points)
+    # The first day is the baseline
+    hist = hist.copy()
+    hist.iloc[:1] = 0
+    return (1 + hist).cumprod().sub(1).mul(100)
@@ -0,0 +1,189 @@
+# Headless batch runner: precomputes Home and Analysis metrics for every user.
+# Run from the project root:  python -m ml_engine.batch_runner --workers 4
+#
+# Prices are downloaded once for the distinct tickers across all users and
+# per-ticker metrics are computed once per ticker, so runtime grows with the
+# number of distinct tickers rather than total holdings. Workers read prices
+# from the shared memory-mapped price store, so each one only holds the slices
+# it is working on. Results go to the local analytics store for the pages.
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# --- PATH SETUP ---
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from backend import database, analytics_store, price_store
+from ml_engine import analysis
+
+BENCHMARK = '^GSPC'
+TICKER_CHUNK = 50
+
+# Worker globals, set once per process by _init_worker (the small shared
+# results are sent once per worker instead of with every task)
+_START = None
+_BENCH_RETURNS = None
+_RISK = None
+
+def _init_worker(start, bench_returns, risk):
+    global _START, _BENCH_RETURNS, _RISK
+    _START = start
+    _BENCH_RETURNS = bench_returns
+    _RISK = risk
+
+# --- PER-TICKER WORK ---
+
+def _ticker_metrics(args):
+    """
+    Beta / Sharpe / Volatility / Total Return for a chunk of tickers.
+    Each ticker is aligned with the benchmark on its own, so a recently listed
+    stock doesn't shorten the history of every other stock in the universe.
+    """
+    tickers, start, benchmark = args
+    prices = price_store.get_prices(tickers, start=start)
+    frames = []
+    for t in prices.columns:
+        series = prices[t].dropna()
+        if len(series) < 2:
+            continue
+        try:
+            metrics = analysis.calculate_metrics(series.to_frame(), benchmark)
+        except KeyError:
+            # No overlapping dates with the benchmark
+            continue
+        metrics['Total Return (%)'] = (series.iloc[-1] - series.iloc[0]) / series.iloc[0] * 100
+        frames.append(metrics)
+    return pd.concat(frames) if frames else pd.DataFrame()
+
+def compute_ticker_metrics(tickers, start, benchmark, pool=None):
+    """
+    Runs _ticker_metrics over the whole universe, in chunks across the pool if given.
+    Output: DataFrame (index = Ticker).
+    """
+    chunks = [(tickers[i:i + TICKER_CHUNK], start, benchmark)
+              for i in range(0, len(tickers), TICKER_CHUNK)]
+    results = pool.map(_ticker_metrics, chunks) if pool else map(_ticker_metrics, chunks)
+    frames = [r for r in results if not r.empty]
+    return pd.concat(frames) if frames else pd.DataFrame()
+
+# --- PER-USER WORK ---
+
+def compute_user_results(portfolio):
+    """
+    Everything the Home and Analysis pages need for one user, sliced out of the
+    shared price store. Must run after _init_worker.
+    """
+    prices = price_store.get_prices(list(portfolio), start=_START)
+    if prices.empty:
+        # Saving this would show a $0 net worth until the next run
+        raise ValueError("no prices in the store for any holding")
+    tickers = list(prices.columns)
+
+    latest_prices = prices.ffill().iloc[-1]
+    holdings, total_val, total_cost = analysis.holdings_summary(portfolio, latest_prices)
+
+    return {
+        'holdings': holdings,
+        'total_val': total_val,
+        'total_cost': total_cost,
+        'daily_returns': analysis.portfolio_daily_returns(prices),
+        'benchmark_returns': _BENCH_RETURNS,
+        'risk': _RISK.reindex(tickers).dropna(how='all').rename_axis("Ticker"),
+        'corr': prices.pct_change().corr(),
+        'prices_as_of': prices.index[-1],
+    }
+
+def _user_task(args):
+    user_id, portfolio, dry_run = args
+    try:
+        results = compute_user_results(portfolio)
+        if not dry_run:
+            analytics_store.save_user_analytics(user_id, portfolio, results)
+        return user_id, None
+    except Exception as e:
+        return user_id, str(e)
+
+# --- RUNNER ---
+
+def run(workers=None, dry_run=False):
+    """
+    Loads every portfolio, fetches prices once, computes and stores all results.
+    Returns a stats dict (also printed as a throughput report).
+    """
+    timings = {}
+    t0 = time.perf_counter()
+
+    portfolios = database.get_all_portfolios()
+    tickers = sorted({t for p in portfolios.values() for t in p})
+    total_holdings = sum(len(p) for p in portfolios.values())
+    timings['load portfolios'] = time.perf_counter() - t0
+
+    if not portfolios:
+        print("No portfolios found.")
+        return {}
+
+    # One download for the whole universe (plus the benchmark). This also fills
+    # the price store that the workers read from.
+    t = time.perf_counter()
+    data = database.fetch_market_data(tickers + [BENCHMARK])
+    if BENCHMARK not in data:
+        print("Could not fetch benchmark data.")
+        return {}
+    # Workers only see what made it into the store, and writing it is best effort.
+    # If any fetched ticker is missing, stop rather than save empty results for users.
+    fetched = [t for t in data.columns if data[t].notna().any()]
+    missing = price_store.stale_tickers(fetched)
+    if missing:
+        print(f"Price store is missing {len(missing)} of {len(fetched)} fetched tickers "
+              f"(e.g. {', '.join(missing[:5])}); no results were saved.")
+        return {}
+    start = data.index[0]
+    bench_prices = data[BENCHMARK].dropna()
+    bench_returns = bench_prices.pct_change().fillna(0)
+    del data
+    timings['fetch prices'] = time.perf_counter() - t
+
+    with ProcessPoolExecutor(max_workers=workers) as ticker_pool:
+        t = time.perf_counter()
+        risk = compute_ticker_metrics(tickers, start, bench_prices, pool=ticker_pool)
+        timings['ticker metrics'] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    errors = {}
+    tasks = [(uid, p, dry_run) for uid, p in portfolios.items()]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(start, bench_returns, risk)) as pool:
+        for user_id, err in pool.map(_user_task, tasks, chunksize=max(1, len(tasks) // 64)):
+            if err:
+                errors[user_id] = err
+    timings['user metrics + write'] = time.perf_counter() - t
+
+    total = time.perf_counter() - t0
+    stats = {
+        'users': len(portfolios),
+        'distinct_tickers': len(tickers),
+        'total_holdings': total_holdings,
+        'errors': errors,
+        'timings': timings,
+        'seconds': total,
+        'users_per_sec': len(portfolios) / total if total > 0 else float('inf'),
+    }
+
+    # --- REPORT ---
+    print(f"Users: {stats['users']} | Holdings: {total_holdings} | Distinct tickers: {len(tickers)}")
+    for step, secs in timings.items():
+        print(f"  {step:<22} {secs:8.2f}s")
+    print(f"Total: {total:.2f}s ({stats['users_per_sec']:,.1f} users/sec)")
+    for user_id, err in errors.items():
+        print(f"  Failed for {user_id}: {err}")
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute portfolio analytics for all users.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--dry-run", action="store_true", help="Compute everything but don't save results")
+    args = parser.parse_args()
+    run(workers=args.workers, dry_run=args.dry_run)
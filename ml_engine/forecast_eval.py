@@ -0,0 +1,202 @@
+# Walk-forward backtest for the forecast engines.
+# Run from the project root:
+#     python -m ml_engine.forecast_eval --tickers AAPL MSFT
+#     python -m ml_engine.forecast_eval --all-users --workers 8
+#
+# For each ticker we pick several past cutoff dates, fit the engine on the prices
+# up to that date only, and compare its forecast with what actually happened
+# 5, 10 and 21 trading days later. Every (ticker, cutoff) fit runs in its own
+# worker process. Results are cached so the AI Forecast page can show an
+# accuracy badge without fitting anything.
+import argparse
+import datetime as dt
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+# --- PATH SETUP ---
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from backend import database, storage
+from ml_engine import analysis
+
+# --- CONFIGURATION ---
+HORIZONS = (5, 10, 21)   # trading days (21 ~ the 30 calendar days shown on the page)
+N_CUTOFFS = 6
+STEP = 21                # trading days between cutoffs
+MIN_TRAIN = 120          # don't evaluate fits with less history than this
+INTERVAL_WIDTH = 0.8     # Prophet's default uncertainty interval
+
+# --- ENGINES ---
+# A forecast engine has the same signature as analysis.predict_future:
+# (stock_data, ticker, days) -> DataFrame with ds, yhat, yhat_lower, yhat_upper
+
+def naive_forecast(stock_data, ticker, days=30):
+    """
+    Baseline: tomorrow looks like today. The interval widens with the square root
+    of time using the stock's historical daily volatility.
+    Any engine that can't beat this isn't adding much.
+    """
+    series = stock_data[ticker].dropna()
+    last = series.iloc[-1]
+    daily_vol = np.log(series).diff().std()
+
+    ds = pd.date_range(series.index[-1] + pd.Timedelta(days=1), periods=days, freq='D')
+    # Calendar days -> trading days
+    trading_days = np.arange(1, days + 1) * 5 / 7
+    z = NormalDist().inv_cdf(0.5 + INTERVAL_WIDTH / 2)
+    band = z * daily_vol * np.sqrt(trading_days)
+
+    return pd.DataFrame({
+        'ds': ds,
+        'yhat': last,
+        'yhat_lower': last * np.exp(-band),
+        'yhat_upper': last * np.exp(band),
+    })
+
+ENGINES = {
+    'prophet': analysis.predict_future,
+    'naive': naive_forecast,
+}
+
+# --- WALK-FORWARD ---
+
+def cutoff_positions(n_prices, horizons=HORIZONS, n_cutoffs=N_CUTOFFS, step=STEP, min_train=MIN_TRAIN):
+    """
+    Index positions of the cutoffs, newest first. The newest one leaves exactly
+    enough days after it to check the longest horizon.
+    """
+    last = n_prices - 1 - max(horizons)
+    positions = [last - k * step for k in range(n_cutoffs)]
+    return [p for p in positions if p + 1 >= min_train]
+
+def _evaluate_cutoff(args):
+    """
+    Fits one engine on the prices up to one cutoff and scores it at each horizon.
+    Runs in a worker process.
+    """
+    ticker, series, pos, engine, horizons = args
+    train = series.iloc[:pos + 1]
+    test = series.iloc[pos + 1:pos + 1 + max(horizons)]
+    days = (test.index[-1] - train.index[-1]).days
+
+    try:
+        forecast = ENGINES[engine](train.to_frame(ticker), ticker, days=days)
+    except Exception as e:
+        print(f"Error forecasting {ticker} at {train.index[-1]:%Y-%m-%d}: {e}")
+        return []
+
+    forecast = forecast.set_index(pd.to_datetime(forecast['ds']).dt.normalize())
+    rows = []
+    for h in horizons:
+        if h > len(test):
+            continue
+        date = test.index[h - 1].normalize()
+        if date not in forecast.index:
+            continue
+        fc = forecast.loc[date]
+        actual = test.iloc[h - 1]
+        rows.append({
+            'Ticker': ticker,
+            'Cutoff': train.index[-1],
+            'Horizon': h,
+            'Actual': actual,
+            'Forecast': fc['yhat'],
+            'APE': abs(actual - fc['yhat']) / abs(actual) * 100,
+            'Covered': fc['yhat_lower'] <= actual <= fc['yhat_upper'],
+        })
+    return rows
+
+def evaluate(stock_data, engine='prophet', horizons=HORIZONS, n_cutoffs=N_CUTOFFS,
+             step=STEP, workers=None):
+    """
+    Runs the walk-forward backtest for every ticker in a DataFrame of prices.
+    Output: (detail DataFrame with one row per ticker/cutoff/horizon,
+             summary DataFrame indexed by (Ticker, Horizon) with MAPE (%), Coverage (%), Cutoffs)
+    """
+    tasks = []
+    for ticker in stock_data.columns:
+        series = stock_data[ticker].dropna()
+        series.index = pd.DatetimeIndex(series.index).tz_localize(None)
+        for pos in cutoff_positions(len(series), horizons, n_cutoffs, step):
+            tasks.append((ticker, series, pos, engine, tuple(horizons)))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        detail = pd.DataFrame([row for rows in pool.map(_evaluate_cutoff, tasks) for row in rows])
+
+    if detail.empty:
+        return detail, pd.DataFrame(columns=['MAPE (%)', 'Coverage (%)', 'Cutoffs'])
+
+    summary = detail.groupby(['Ticker', 'Horizon']).agg(
+        **{'MAPE (%)': ('APE', 'mean'), 'Coverage (%)': ('Covered', 'mean'), 'Cutoffs': ('APE', 'size')}
+    )
+    summary['Coverage (%)'] *= 100
+    return detail, summary
+
+# --- CACHE ---
+
+def _cache_file(engine):
+    return f"forecast_eval/{engine}.pkl"
+
+def save_accuracy(summary, engine, as_of):
+    """
+    Stores per-ticker accuracy, keeping results for tickers not in this run.
+    """
+    cache = storage.load_pickle(_cache_file(engine), default={}) or {}
+    now = dt.datetime.now()
+    for ticker, rows in summary.groupby(level='Ticker'):
+        cache[ticker] = {
+            'summary': rows.droplevel('Ticker'),
+            'as_of': as_of.get(ticker),
+            'computed_at': now,
+        }
+    storage.save_pickle(cache, _cache_file(engine))
+
+def load_accuracy(ticker, engine='prophet'):
+    """
+    Cached backtest result for one ticker, or None if it hasn't been evaluated.
+    Returns {'summary': DataFrame indexed by Horizon, 'as_of': last price date, 'computed_at': ...}
+    """
+    cache = storage.load_pickle(_cache_file(engine), default={}) or {}
+    return cache.get(ticker)
+
+# --- RUNNER ---
+
+def run(tickers, engine='prophet', workers=None):
+    """
+    Fetches prices, runs the backtest, caches and prints the results.
+    """
+    start = time.perf_counter()
+    stock_data = database.fetch_market_data(list(tickers)).dropna(axis=1, how='all')
+    if stock_data.empty:
+        print("No price data found.")
+        return None
+
+    detail, summary = evaluate(stock_data, engine=engine, workers=workers)
+    as_of = {t: stock_data[t].last_valid_index() for t in stock_data.columns}
+    if not summary.empty:
+        save_accuracy(summary, engine, as_of)
+
+    elapsed = time.perf_counter() - start
+    print(summary.round(2).to_string())
+    print(f"{engine}: {len(detail)} checks over {stock_data.shape[1]} tickers in {elapsed:.1f}s")
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the forecast engines.")
+    parser.add_argument("--tickers", nargs="*", default=[], help="Tickers to evaluate")
+    parser.add_argument("--all-users", action="store_true", help="Evaluate every ticker in any user's portfolio")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="prophet")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    tickers = set(t.upper() for t in args.tickers)
+    if args.all_users:
+        tickers |= {t for p in database.get_all_portfolios().values() for t in p}
+    if not tickers:
+        parser.error("Give --tickers and/or --all-users")
+    run(sorted(tickers), engine=args.engine, workers=args.workers)
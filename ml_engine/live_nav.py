@@ -0,0 +1,89 @@
+import pandas as pd
+
+class LiveNav:
+    """
+    Keeps the Home page numbers (net worth, P/L, top performer and the latest
+    point of the growth chart) up to date as individual prices change.
+    Each update only touches the tickers that changed, so a tick costs
+    O(changed tickers) instead of revaluing the whole portfolio.
+    """
+
+    def __init__(self, portfolio, last_prices, base_growth=0.0):
+        """
+        portfolio:   {'AAPL': {'quantity': 10, 'avg_cost': 150}, ...}
+        last_prices: {Ticker: Price} at the end of the price history
+        base_growth: the last value (%) of the portfolio growth chart
+        """
+        self.qty = {t: info['quantity'] for t, info in portfolio.items()}
+        self.cost = {t: info['quantity'] * info['avg_cost'] for t, info in portfolio.items()}
+        self.prices = {t: float(last_prices.get(t, 0) or 0) for t in portfolio}
+        # Intraday moves are measured against the last historical price
+        self.ref_prices = {t: p for t, p in self.prices.items() if p > 0}
+
+        self.total_val = sum(self.qty[t] * p for t, p in self.prices.items())
+        self.total_cost = sum(self.cost.values())
+        self.gains = {t: self._gain(t) for t in portfolio}
+        self._top = max(self.gains, key=self.gains.get) if self.gains else None
+
+        # The chart is an equal-weighted average of daily returns, so we keep the
+        # running sum of each ticker's return since the last historical point
+        self.base_growth = base_growth
+        self._return_sum = 0.0
+        self.updated_at = pd.Timestamp.now()
+
+    def _gain(self, t):
+        cost = self.cost[t]
+        return (self.qty[t] * self.prices[t] - cost) / cost * 100 if cost > 0 else 0
+
+    def apply(self, updates):
+        """
+        Applies {ticker: new price}. Returns the number of holdings that changed.
+        """
+        changed = 0
+        for t, price in updates.items():
+            if t not in self.qty or not price or price <= 0:
+                continue
+            old = self.prices[t]
+            self.prices[t] = price
+            self.total_val += self.qty[t] * (price - old)
+
+            ref = self.ref_prices.setdefault(t, price)
+            self._return_sum += (price - old) / ref if old > 0 else 0
+
+            old_gain, gain = self.gains[t], self._gain(t)
+            self.gains[t] = gain
+            if t == self._top:
+                if gain < old_gain:
+                    # The leader fell back; this is the only case that needs a full scan
+                    self._top = max(self.gains, key=self.gains.get)
+            elif self._top is None or gain > self.gains[self._top]:
+                self._top = t
+            changed += 1
+
+        if changed:
+            self.updated_at = pd.Timestamp.now()
+        return changed
+
+    @property
+    def total_pl(self):
+        return self.total_val - self.total_cost
+
+    @property
+    def return_pct(self):
+        return self.total_pl / self.total_cost * 100 if self.total_cost > 0 else 0
+
+    @property
+    def top_performer(self):
+        """
+        (Ticker, Gain %) of the best holding, or None for an empty portfolio.
+        """
+        return (self._top, self.gains[self._top]) if self._top is not None else None
+
+    @property
+    def latest_growth(self):
+        """
+        Live value (%) of the portfolio growth chart.
+        """
+        n = len(self.ref_prices)
+        day_return = self._return_sum / n if n else 0
+        return ((1 + self.base_growth / 100) * (1 + day_return) - 1) * 100
@@ -0,0 +1,258 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+TRADING_DAYS = 252
+MAX_ITER = 5000
+TOL = 1e-8
+
+# The frontier is traced in two passes: a coarse sweep of the risk aversion over
+# this many decades, then one solve per target return (see efficient_frontier)
+COARSE_POINTS = 40
+LAMBDA_DECADES = 4
+
+# Covariance / expected returns are expensive for big universes and get reused for
+# every frontier point, the min-variance and max-Sharpe portfolios and reruns.
+# Keyed on a hash of the prices themselves, so new data for the same tickers and
+# dates is never served stale. Bounded, least recently used entries go first.
+# {(tickers, price hash): (mu, cov)}
+INPUTS_CACHE_SIZE = 16
+_INPUTS_CACHE = OrderedDict()
+_INPUTS_LOCK = threading.Lock()
+
+def _prices_key(stock_data):
+    row_hashes = pd.util.hash_pandas_object(stock_data, index=True).to_numpy()
+    return tuple(stock_data.columns), hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+def estimate_inputs(stock_data):
+    """
+    Annualized expected returns and covariance matrix from a DataFrame of prices.
+    Cached per price data, so it is computed once and reused.
+    Output: (mu Series, cov DataFrame)
+    """
+    key = _prices_key(stock_data)
+    with _INPUTS_LOCK:
+        if key in _INPUTS_CACHE:
+            _INPUTS_CACHE.move_to_end(key)
+            return _INPUTS_CACHE[key]
+
+    # The store's dates are the union over all tickers, so a stock in a portfolio with
+    # crypto has empty weekend rows. Carrying the last price forward makes Monday's
+    # return Friday -> Monday (instead of NaN, zeroed below) and the weekend 0%.
+    returns = stock_data.ffill().pct_change().iloc[1:].fillna(0)
+    # ...which is why we annualize by the rows per year we actually have
+    # (~252 for stocks only, ~365 with weekend rows) rather than always 252
+    years = (stock_data.index[-1] - stock_data.index[0]).days / 365.25
+    periods = len(returns) / years if years > 0 else TRADING_DAYS
+    inputs = (returns.mean() * periods, returns.cov() * periods)
+
+    with _INPUTS_LOCK:
+        _INPUTS_CACHE[key] = inputs
+        while len(_INPUTS_CACHE) > INPUTS_CACHE_SIZE:
+            _INPUTS_CACHE.popitem(last=False)
+    return inputs
+
+# --- SOLVER ---
+
+def _project_simplex(V):
+    """
+    Projects every row of V onto {w >= 0, sum(w) = 1} (long-only, fully invested).
+    Sort-based method from Duchi et al. (2008), vectorized over rows.
+    """
+    n = V.shape[1]
+    U = -np.sort(-V, axis=1)
+    css = np.cumsum(U, axis=1) - 1
+    cond = U - css / np.arange(1, n + 1) > 0
+    # Index of the last True in each row
+    rho = n - 1 - np.argmax(cond[:, ::-1], axis=1)
+    theta = css[np.arange(len(V)), rho] / (rho + 1)
+    return np.maximum(V - theta[:, None], 0)
+
+def _solve_batch(M, cov, lams, W0=None, max_iter=MAX_ITER, tol=TOL):
+    """
+    Solves many long-only mean-variance problems at once:
+        row k: minimize  lams[k]/2 * w'Σw - M[k]'w   over the simplex
+    with accelerated projected gradient (FISTA). All rows share one covariance
+    matrix, so each iteration is a single (points x assets) @ (assets x assets) product.
+    W0 (optional) is a starting point per row, e.g. the solution of a nearby problem.
+    """
+    P, n = M.shape
+    # Step size = 1 / Lipschitz constant of each row's gradient
+    eig_max = np.linalg.eigvalsh(cov)[-1]
+    step = 1.0 / (lams * eig_max + 1e-12)
+
+    W = np.full((P, n), 1.0 / n) if W0 is None else W0.copy()
+    Y = W.copy()
+    t = 1.0
+    for _ in range(max_iter):
+        G = lams[:, None] * (Y @ cov) - M
+        W_new = _project_simplex(Y - step[:, None] * G)
+        t_new = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        Y = W_new + ((t - 1) / t_new) * (W_new - W)
+        done = np.abs(W_new - W).max() < tol
+        W, t = W_new, t_new
+        if done:
+            break
+    return W
+
+# --- PUBLIC API ---
+
+def _corner_lambda(mu_v, cov_m):
+    """
+    Largest risk aversion at which holding only the highest-return asset is still
+    optimal (from the optimality conditions of the simplex problem), or None.
+    """
+    k = int(np.argmax(mu_v))
+    var_drop = cov_m[k, k] - cov_m[:, k]
+    gain = mu_v[k] - mu_v
+    mask = var_drop > 1e-15
+    if not mask.any():
+        return None
+    lam = float(np.min(gain[mask] / var_drop[mask]))
+    return lam if lam > 0 else None
+
+def efficient_frontier(mu, cov, n_points=100, risk_free_rate=0.04):
+    """
+    Long-only efficient frontier, with points evenly spaced in expected return
+    from the minimum-variance portfolio to the highest-return asset.
+    Each point solves "lam/2 * risk - return" for some risk aversion lam. A coarse
+    sweep of lam (starting where the portfolio stops being just the best asset)
+    shows how the return falls as lam grows, and interpolating it gives the lam
+    for every target return. Both passes solve all their points in one batch.
+    Output: dict with
+      'frontier':     DataFrame (Return, Volatility, Sharpe) per point, sorted by volatility
+      'weights':      DataFrame (points x tickers)
+      'min_variance': Series of weights
+      'max_sharpe':   Series of weights
+    """
+    tickers = list(mu.index)
+    mu_v, cov_m = mu.to_numpy(dtype='float64'), cov.to_numpy(dtype='float64')
+    n = len(mu_v)
+
+    lam_lo = _corner_lambda(mu_v, cov_m)
+    if lam_lo is None:
+        # Scale of risk aversion where return and risk terms are comparable
+        spread = max(mu_v.max() - mu_v.min(), 1e-6)
+        lam_lo = spread / max(np.diag(cov_m).mean(), 1e-12) * 1e-2
+    coarse = np.geomspace(lam_lo, lam_lo * 10 ** LAMBDA_DECADES, COARSE_POINTS)
+
+    # Pass 1: coarse sweep. Last row: pure minimum variance (no return term)
+    M = np.vstack([np.tile(mu_v, (COARSE_POINTS, 1)), np.zeros(n)])
+    W = _solve_batch(M, cov_m, np.append(coarse, 1.0))
+    W_coarse, w_min_var = W[:-1], W[-1]
+
+    # Pass 2: the return falls as lam grows, so read the coarse curve backwards
+    # (np.interp wants increasing x) to find the lam of each interior target
+    targets = np.linspace(w_min_var @ mu_v, mu_v.max(), n_points)
+    coarse_rets = np.maximum.accumulate((W_coarse @ mu_v)[::-1])
+    lams = np.exp(np.interp(targets[1:-1], coarse_rets, np.log(coarse)[::-1]))
+    W_inner = np.empty((0, n))
+    if len(lams):
+        # Warm start every point from the coarse solution with the nearest lam
+        nearest = np.minimum(np.searchsorted(coarse, lams), COARSE_POINTS - 1)
+        W_inner = _solve_batch(np.tile(mu_v, (len(lams), 1)), cov_m, lams, W0=W_coarse[nearest])
+
+    w_max_ret = np.zeros(n)
+    w_max_ret[np.argmax(mu_v)] = 1.0
+    W_frontier = np.vstack([w_min_var, W_inner, w_max_ret])[:n_points]
+
+    rets = W_frontier @ mu_v
+    vols = np.sqrt(np.einsum('ij,jk,ik->i', W_frontier, cov_m, W_frontier))
+    sharpe = (rets - risk_free_rate) / np.where(vols > 0, vols, np.nan)
+
+    frontier = pd.DataFrame({"Return": rets, "Volatility": vols, "Sharpe": sharpe})
+    order = np.argsort(vols)
+    best = int(np.nanargmax(sharpe)) if np.isfinite(sharpe).any() else 0
+
+    return {
+        'frontier': frontier.iloc[order].reset_index(drop=True),
+        'weights': pd.DataFrame(W_frontier[order], columns=tickers),
+        'min_variance': pd.Series(w_min_var, index=tickers),
+        'max_sharpe': pd.Series(W_frontier[best], index=tickers),
+    }
+
+def portfolio_stats(weights, mu, cov, risk_free_rate=0.04):
+    """
+    (Return, Volatility, Sharpe) of one set of weights.
+    """
+    w = weights.reindex(mu.index).fillna(0).to_numpy()
+    ret = float(w @ mu.to_numpy())
+    vol = float(np.sqrt(w @ cov.to_numpy() @ w))
+    return ret, vol, (ret - risk_free_rate) / vol if vol > 0 else 0
+
+def rebalance_orders(portfolio, latest_prices, target_weights, min_weight=0.001):
+    """
+    Shares to buy/sell to move from the current holdings to the target weights,
+    keeping the total portfolio value the same.
+    Weights below `min_weight` are treated as 0 (sell everything).
+    Output: DataFrame (one row per ticker).
+    """
+    target = target_weights.where(target_weights >= min_weight, 0)
+    target = target / target.sum()
+
+    values = {t: info['quantity'] * latest_prices.get(t, 0) for t, info in portfolio.items()}
+    total_val = sum(values.values())
+
+    rows = []
+    for t in sorted(set(portfolio) | set(target.index)):
+        price = latest_prices.get(t, 0)
+        qty = portfolio.get(t, {}).get('quantity', 0)
+        target_val = target.get(t, 0) * total_val
+        target_qty = target_val / price if price else 0
+        rows.append({
+            "Ticker": t,
+            "Current Weight": values.get(t, 0) / total_val * 100 if total_val else 0,
+            "Target Weight": target.get(t, 0) * 100,
+            "Current Shares": qty,
+            "Target Shares": target_qty,
+            "Shares to Trade": target_qty - qty,
+            "Trade Value": target_val - values.get(t, 0),
+        })
+    return pd.DataFrame(rows)
+
+# --- BENCHMARK ---
+
+def make_synthetic_returns(n_assets=300, n_days=TRADING_DAYS * 3, n_factors=5, seed=42):
+    """
+    Factor-model daily returns (like a real market: assets share a few common drivers).
+    Output: DataFrame of prices (days x assets).
+    """
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.01, (n_days, n_factors))
+    loadings = rng.normal(0, 1, (n_factors, n_assets))
+    drift = rng.normal(0.0004, 0.0003, n_assets)
+    noise = rng.normal(0, 0.015, (n_days, n_assets))
+    returns = drift + factors @ loadings * 0.5 + noise
+    prices = 100 * np.cumprod(1 + returns, axis=0)
+    dates = pd.bdate_range("2020-01-01", periods=n_days)
+    return pd.DataFrame(prices, index=dates, columns=[f"A{i:03d}" for i in range(n_assets)])
+
+def benchmark(n_assets=300, n_points=100):
+    """
+    Times a full frontier on synthetic data and prints the result.
+    """
+    prices = make_synthetic_returns(n_assets=n_assets)
+
+    start = time.perf_counter()
+    mu, cov = estimate_inputs(prices)
+    inputs_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = efficient_frontier(mu, cov, n_points=n_points)
+    solve_time = time.perf_counter() - start
+
+    ms = result['frontier'].loc[result['frontier']['Sharpe'].idxmax()]
+    print(f"{n_assets} assets, {n_points} frontier points")
+    print(f"  covariance: {inputs_time:.3f}s | frontier: {solve_time:.3f}s "
+          f"({result['frontier']['Return'].round(6).nunique()} distinct points)")
+    print(f"  max Sharpe: return {ms['Return']:.1%}, volatility {ms['Volatility']:.1%}, Sharpe {ms['Sharpe']:.2f}")
+    return solve_time
+
+if __name__ == "__main__":
+    # Run from the project root: python -m ml_engine.optimizer
+    benchmark()
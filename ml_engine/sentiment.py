@@ -0,0 +1,293 @@
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import yfinance as yf
+
+from backend import storage
+
+# --- CONFIGURATION ---
+CACHE_FILE = "sentiment_scores.pkl"
+CACHE_LOCK_FILE = "sentiment_scores.lock"
+BATCH_SIZE = 64
+
+# Scores are cached per model name, so swapping in a new model never reuses old scores.
+# Headlines stop showing up in the news feed after a few days, so old scores are
+# dropped, and each model keeps at most MAX_SCORES (newest first).
+# {model_name: {article_hash: (score, scored_at)}}
+MAX_SCORE_AGE = 30 * 24 * 60 * 60
+MAX_SCORES = 50000
+_CACHE = None
+_CACHE_MTIME = None
+_CACHE_LOCK = threading.Lock()
+
+# --- LEXICON MODEL (offline default) ---
+# A tiny finance-flavoured word list. Not as smart as a transformer,
+# but it runs anywhere, needs no downloads and is fast enough to score
+# thousands of headlines per second.
+POSITIVE_WORDS = {
+    'beat', 'beats', 'surge', 'surges', 'soar', 'soars', 'jump', 'jumps', 'rally', 'rallies',
+    'gain', 'gains', 'record', 'growth', 'grow', 'grows', 'profit', 'profits', 'strong',
+    'upgrade', 'upgrades', 'upgraded', 'outperform', 'bullish', 'buy', 'raise', 'raises',
+    'raised', 'boost', 'boosts', 'expand', 'expands', 'approval', 'approved', 'win', 'wins',
+    'dividend', 'buyback', 'rebound', 'rebounds', 'optimistic', 'top', 'tops', 'high', 'higher',
+}
+NEGATIVE_WORDS = {
+    'miss', 'misses', 'missed', 'plunge', 'plunges', 'drop', 'drops', 'fall', 'falls', 'slump',
+    'slumps', 'loss', 'losses', 'weak', 'weaker', 'downgrade', 'downgrades', 'downgraded',
+    'underperform', 'bearish', 'sell', 'cut', 'cuts', 'layoffs', 'lawsuit', 'sued', 'probe',
+    'investigation', 'fraud', 'recall', 'recalls', 'decline', 'declines', 'warning', 'warns',
+    'bankruptcy', 'default', 'crash', 'crashes', 'fear', 'fears', 'low', 'lower', 'risk',
+}
+NEGATORS = {'not', 'no', 'never', "isn't", "doesn't", "didn't", "won't", 'without'}
+_WORD_RE = re.compile(r"[a-z']+")
+
+def lexicon_model(texts):
+    """
+    Scores a batch of texts with the word lists above.
+    Output: list of floats in [-1, 1] (negative = bearish, positive = bullish).
+    A negator right before a word flips it ("not strong" counts as negative).
+    """
+    scores = []
+    for text in texts:
+        words = _WORD_RE.findall(text.lower())
+        raw = 0
+        for i, w in enumerate(words):
+            hit = 1 if w in POSITIVE_WORDS else -1 if w in NEGATIVE_WORDS else 0
+            if hit and i > 0 and words[i - 1] in NEGATORS:
+                hit = -hit
+            raw += hit
+        # Squash into [-1, 1] (same normalisation VADER uses)
+        scores.append(raw / math.sqrt(raw * raw + 15))
+    return scores
+
+lexicon_model.model_name = "lexicon-v1"
+
+def _model_name(model):
+    return getattr(model, 'model_name', getattr(model, '__name__', type(model).__name__))
+
+# --- HEADLINE INGESTION ---
+
+def _normalize_news_item(ticker, item):
+    """
+    yfinance has changed its news format over time; this flattens both shapes into
+    {'ticker', 'title', 'summary', 'publisher', 'link', 'published'}.
+    """
+    content = item.get('content') or item
+    provider = content.get('provider') or {}
+    canonical = content.get('canonicalUrl') or content.get('clickThroughUrl')
+    link = canonical.get('url') if isinstance(canonical, dict) else content.get('link')
+    return {
+        'ticker': ticker,
+        'title': content.get('title') or '',
+        'summary': content.get('summary') or '',
+        'publisher': provider.get('displayName') or content.get('publisher') or '',
+        'link': link or '',
+        'published': content.get('pubDate') or content.get('providerPublishTime'),
+    }
+
+def _fetch_one(ticker):
+    try:
+        news = yf.Ticker(ticker).news or []
+        return [_normalize_news_item(ticker, item) for item in news]
+    except Exception as e:
+        print(f"Error fetching news for {ticker}: {e}")
+        return []
+
+def fetch_headlines(tickers, max_workers=8):
+    """
+    Fetches recent news for each ticker in parallel.
+    Returns a flat list of article dicts (one per ticker mention).
+    """
+    if not tickers:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers))) as pool:
+        results = pool.map(_fetch_one, tickers)
+    return [article for articles in results for article in articles]
+
+def article_hash(article):
+    """
+    Content hash of an article. Whitespace and case are ignored, so the same
+    wire story syndicated by several publishers is only scored once.
+    """
+    text = f"{article.get('title', '')}\n{article.get('summary', '')}"
+    text = " ".join(text.lower().split())
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+# --- SCORE CACHE ---
+
+def _cache_mtime():
+    path = storage.cache_path(CACHE_FILE)
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+def _load_cache():
+    """
+    Returns the score cache, reloading it if another process saved new scores.
+    """
+    global _CACHE, _CACHE_MTIME
+    mtime = _cache_mtime()
+    if _CACHE is None or mtime != _CACHE_MTIME:
+        _CACHE = storage.load_pickle(CACHE_FILE, default={}) or {}
+        _CACHE_MTIME = mtime
+    return _CACHE
+
+def _score(entry):
+    # Caches written before scores were timestamped hold plain floats
+    return entry[0] if isinstance(entry, tuple) else entry
+
+def _prune(scores, now):
+    """
+    Drops scores older than MAX_SCORE_AGE and keeps the newest MAX_SCORES.
+    """
+    fresh = {h: e for h, e in scores.items()
+             if isinstance(e, tuple) and now - e[1] <= MAX_SCORE_AGE}
+    if len(fresh) > MAX_SCORES:
+        newest = sorted(fresh, key=lambda h: fresh[h][1], reverse=True)[:MAX_SCORES]
+        fresh = {h: fresh[h] for h in newest}
+    return fresh
+
+def _save_cache(model_name, new_scores):
+    """
+    Adds new scores to the cache and saves it. The file is re-read under a file
+    lock, so scores saved by another process (or session) meanwhile are kept.
+    """
+    global _CACHE, _CACHE_MTIME
+    now = time.time()
+    with storage.file_lock(CACHE_LOCK_FILE):
+        merged = storage.load_pickle(CACHE_FILE, default={}) or {}
+        scores = merged.get(model_name, {})
+        scores.update({h: (score, now) for h, score in new_scores.items()})
+        merged[model_name] = _prune(scores, now)
+        storage.save_pickle(merged, CACHE_FILE)
+        mtime = _cache_mtime()
+    with _CACHE_LOCK:
+        _CACHE, _CACHE_MTIME = merged, mtime
+
+# --- PIPELINE ---
+
+def score_articles(articles, model=lexicon_model, batch_size=BATCH_SIZE):
+    """
+    Scores a list of article dicts, only running the model on articles we
+    have never seen before (by content hash).
+    `model` is any callable that takes a list of texts and returns a list of scores;
+    give it a `model_name` attribute so its cache is kept separate.
+    Returns (DataFrame of articles with 'hash' and 'sentiment' columns, stats dict).
+    """
+    start = time.perf_counter()
+    name = _model_name(model)
+
+    hashes = [article_hash(a) for a in articles]
+    # Unique articles in first-seen order, so each text is scored at most once per call
+    unique = dict(zip(hashes, articles))
+
+    with _CACHE_LOCK:
+        cached = _load_cache().get(name, {})
+    scores = {h: _score(cached[h]) for h in unique if h in cached}
+    unseen = [h for h in unique if h not in scores]
+
+    # The model runs without holding any lock, so a slow model doesn't hold up other sessions
+    new_scores = {}
+    for i in range(0, len(unseen), batch_size):
+        batch = unseen[i:i + batch_size]
+        texts = [f"{unique[h]['title']}. {unique[h]['summary']}" for h in batch]
+        new_scores.update(zip(batch, model(texts)))
+
+    if new_scores:
+        _save_cache(name, new_scores)
+        scores.update(new_scores)
+
+    df = pd.DataFrame(articles)
+    df['hash'] = hashes
+    df['sentiment'] = [scores.get(h) for h in hashes]
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        'articles': len(articles),
+        'unique': len(unique),
+        'scored': len(new_scores),
+        'cache_hit_rate': (1 - len(unseen) / len(unique)) if unique else 1.0,
+        'seconds': elapsed,
+        'articles_per_sec': len(articles) / elapsed if elapsed > 0 else float('inf'),
+    }
+    return df, stats
+
+def summarize_sentiment(scored_df):
+    """
+    Aggregates article scores per ticker.
+    Output: DataFrame (index = ticker) with average sentiment, article count and a label.
+    """
+    if scored_df.empty:
+        return pd.DataFrame(columns=['Sentiment', 'Articles', 'Mood'])
+    summary = scored_df.groupby('ticker')['sentiment'].agg(['mean', 'count'])
+    summary.columns = ['Sentiment', 'Articles']
+    summary['Mood'] = pd.cut(summary['Sentiment'], bins=[-1.01, -0.15, 0.15, 1.01],
+                             labels=["Bearish 🔴", "Neutral ⚪", "Bullish 🟢"])
+    return summary
+
+def get_news_sentiment(tickers, model=lexicon_model):
+    """
+    Full pipeline for the analysis page: fetch headlines -> dedupe -> score -> aggregate.
+    Returns (per-ticker summary, scored articles).
+    """
+    articles = fetch_headlines(list(tickers))
+    scored_df, _ = score_articles(articles, model=model)
+    return summarize_sentiment(scored_df), scored_df
+
+# --- BENCHMARK ---
+
+def make_fixture_corpus(n_articles=10000, n_tickers=50, duplicate_rate=0.5, seed=42):
+    """
+    Builds a synthetic, deterministic headline corpus for offline benchmarking.
+    About `duplicate_rate` of the articles repeat an earlier story (like syndicated news).
+    """
+    import random
+    rng = random.Random(seed)
+    subjects = [f"TCK{i}" for i in range(n_tickers)]
+    verbs = sorted(POSITIVE_WORDS | NEGATIVE_WORDS) + ['reports', 'announces', 'holds', 'updates']
+    objects = ['quarterly earnings', 'guidance', 'new product', 'CEO change', 'analyst day',
+               'revenue', 'margins', 'supply chain', 'market share', 'outlook']
+
+    corpus = []
+    for i in range(n_articles):
+        if corpus and rng.random() < duplicate_rate:
+            corpus.append(dict(rng.choice(corpus)))
+            continue
+        ticker = rng.choice(subjects)
+        title = f"{ticker} {rng.choice(verbs)} {rng.choice(objects)} #{i}"
+        corpus.append({'ticker': ticker, 'title': title, 'summary': '', 'publisher': 'Fixture',
+                       'link': '', 'published': None})
+    return corpus
+
+def benchmark(corpus=None, model=lexicon_model, rounds=2):
+    """
+    Runs the pipeline over the same corpus a few times and prints throughput.
+    The first round shows the cold scoring speed, later rounds the cache hit rate.
+    Uses a throwaway cache folder so the real cache isn't touched.
+    """
+    import tempfile
+    global _CACHE, _CACHE_MTIME
+    corpus = corpus if corpus is not None else make_fixture_corpus()
+
+    old_dir, old_cache = storage.CACHE_DIR, _CACHE
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.CACHE_DIR, _CACHE, _CACHE_MTIME = tmp, None, None
+        try:
+            results = []
+            for r in range(rounds):
+                _, stats = score_articles(corpus, model=model)
+                results.append(stats)
+                print(f"Round {r + 1}: {stats['articles']} articles ({stats['unique']} unique), "
+                      f"scored {stats['scored']}, hit rate {stats['cache_hit_rate']:.1%}, "
+                      f"{stats['articles_per_sec']:,.0f} articles/sec")
+        finally:
+            storage.CACHE_DIR, _CACHE, _CACHE_MTIME = old_dir, old_cache, None
+    return results
+
+if __name__ == "__main__":
+    # Run from the project root: python -m ml_engine.sentiment
+    benchmark()